@@ -0,0 +1,100 @@
+"""
+Benchmark of the precompiled cue table: the client-side cost of a cue with requests built and encoded per cue
+versus looked up from the CueTable, and the resulting OBSTextSwitcher.switch_text time against the fake
+obs-websocket server. Run from the repository root:
+
+    python -m benchmarks.cue_table --lines 5000 --cues 300
+"""
+import argparse
+import json
+import time
+import obs_text
+from obs_client import ENCODED_MESSAGE_END, REQUEST_BATCH_EXECUTION_SERIAL_REALTIME
+from obswebsocket import requests as obsrequests
+from cue_table import CueTable
+from fake_obs_server import FakeOBSServer
+
+HOST = "127.0.0.1"
+SETTINGS = dict(scene1="Text 1", scene2="Text 2", source1="Text Source 1", source2="Text Source 2")
+
+
+def encode_per_cue(text, message_id):
+    # What every cue did before the cue table
+    requests = [obsrequests.SetInputSettings(inputName="Text Source 2", inputSettings={"text": text}),
+                obsrequests.SetCurrentProgramScene(sceneName="Text 2")]
+    return json.dumps({"op": 8, "d": {"requestId": message_id, "haltOnFailure": True,
+                                      "executionType": REQUEST_BATCH_EXECUTION_SERIAL_REALTIME,
+                                      "requests": [{"requestType": request.name, "requestData": request.data()}
+                                                   for request in requests]}})
+
+
+def percentile(samples, percent):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, round(percent / 100 * (len(samples) - 1)))]
+
+
+def measure_encoding(lines, obs_text_switcher, repeat):
+    cue_table = CueTable(obs_text_switcher.compile_text, obs_text_switcher.get_targets)
+    cue_table.rebuild(len(lines))
+    for index, text in enumerate(lines):
+        cue_table.get(index, text)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for index, text in enumerate(lines):
+            encode_per_cue(text, str(index))
+    per_cue_time = (time.perf_counter() - start) / (repeat * len(lines))
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for index, text in enumerate(lines):
+            _, encoded_batches = cue_table.get(index, text)
+            encoded_batches[1][0] + str(index) + ENCODED_MESSAGE_END
+    table_time = (time.perf_counter() - start) / (repeat * len(lines))
+    return per_cue_time, table_time
+
+
+def measure_cues(lines, obs_text_switcher, cue_count, compiled):
+    cue_table = CueTable(obs_text_switcher.compile_text, obs_text_switcher.get_targets)
+    cue_table.rebuild(len(lines))
+    durations = []
+    for cue_index in range(cue_count):
+        index = cue_index % len(lines)
+        entry = cue_table.get(index, lines[index]) if compiled else None
+        while obs_text_switcher.is_busy():
+            time.sleep(0.001)
+        start = time.perf_counter()
+        obs_text_switcher.switch_text(lines[index], entry)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the script for the encoding benchmark")
+    parser.add_argument("--cues", type=int, default=300, help="cues sent to the fake OBS per variant")
+    args = parser.parse_args()
+
+    lines = [f"Line {index + 1}: the quick brown fox jumps over the lazy dog" for index in range(args.lines)]
+    fake_obs = FakeOBSServer(HOST, 0, transition_duration=0.0)
+    fake_obs.start_in_thread()
+    obs_text_switcher = obs_text.OBSTextSwitcher(HOST, fake_obs.port)
+    obs_text_switcher.apply_settings(SETTINGS)
+    try:
+        deadline = time.monotonic() + 5
+        while not obs_text_switcher.is_connected() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        per_cue_time, table_time = measure_encoding(lines, obs_text_switcher, args.repeat)
+        print(f"request encoding per cue (us):  built {per_cue_time * 1e6:.2f}  table {table_time * 1e6:.2f}  "
+              f"({per_cue_time / table_time:.1f}x)")
+
+        print(f"\n{'switch_text (ms)':<20} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for name, compiled in (("built", False), ("table", True)):
+            durations = measure_cues(lines, obs_text_switcher, args.cues, compiled)
+            print(f"{name:<20} {percentile(durations, 50) * 1e3:>8.3f} {percentile(durations, 95) * 1e3:>8.3f} "
+                  f"{percentile(durations, 99) * 1e3:>8.3f}")
+    finally:
+        obs_text_switcher.disconnect()
+        fake_obs.stop_thread()
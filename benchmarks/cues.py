@@ -0,0 +1,107 @@
+"""
+End-to-end cue benchmark without OBS: OSC load generator -> OSCServer -> CueEngine -> OBSTextSwitcher
+-> fake obs-websocket server. Run from the repository root:
+
+    python -m benchmarks.cues --rate 5 --duration 20 --transition-duration 0.3 --transition-jitter 0.1
+
+Exits with status 1 if --max-p95-ms is given and the p95 of cue.total (OSC receive to SceneTransitionEnded) is above it.
+"""
+import argparse
+import sys
+import time
+import latency
+import obs_text
+import osc_server
+from cue_engine import CueEngine
+from fake_obs_server import FakeOBSServer
+from benchmarks.osc_load import OSCLoadGenerator, parse_mix
+
+HOST = "127.0.0.1"
+REPORTED_STATS = ("cue.total", "cue.queue_wait", "cue.fire", "cue.obs_to_transition_end")
+SUBMIT_GRACE = 1.0  # seconds the OSC server gets to submit the last datagrams before they count as lost
+
+
+def wait_until_drained(engine, obs_text_switcher, sent_count, timeout):
+    submit_deadline = time.monotonic() + SUBMIT_GRACE
+    while engine.cue_scheduler.get_stats()["submitted"] < sent_count and time.monotonic() < submit_deadline:
+        time.sleep(0.01)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        queue_stats = engine.cue_scheduler.get_stats()
+        if queue_stats["depth"] == 0 and engine.cue_scheduler.firing_cue is None \
+                and not obs_text_switcher.is_transition_active():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def run(args):
+    fake_obs = FakeOBSServer(HOST, 0, transition_duration=args.transition_duration,
+                             transition_jitter=args.transition_jitter, response_delay=args.response_delay, seed=args.seed)
+    fake_obs.start_in_thread()
+    latency.stats.enabled = True
+    latency.stats.reset()
+
+    obs_text_switcher = obs_text.OBSTextSwitcher(HOST, fake_obs.port)
+    obs_text_switcher.scene1, obs_text_switcher.scene2 = "Text 1", "Text 2"
+    obs_text_switcher.source1, obs_text_switcher.source2 = "Text Source 1", "Text Source 2"
+    engine = CueEngine(obs_text_switcher, cue_policy=args.policy)
+    engine.append_lines([f"Line {index + 1}" for index in range(args.lines)])
+    server = osc_server.OSCServer(engine, HOST, 0)
+    osc_port = server.server.server_address[1]
+
+    try:
+        generator = OSCLoadGenerator(HOST, osc_port, args.rate, args.mix, args.lines, seed=args.seed)
+        start_time = time.monotonic()
+        sent = generator.run(args.duration)
+        drained = wait_until_drained(engine, obs_text_switcher, sum(sent.values()),
+                                     args.transition_duration * 100 + 10)
+        elapsed = time.monotonic() - start_time
+        return report(sent, engine.get_stats(), elapsed, drained, fake_obs, args)
+    finally:
+        server.shutdown()
+        engine.stop()
+        obs_text_switcher.disconnect()
+        fake_obs.stop_thread()
+
+
+def report(sent, stats, elapsed, drained, fake_obs, args):
+    queue_stats = stats["queue"]
+    total_sent = sum(sent.values())
+    print(f"sent:        {total_sent} ({', '.join(f'{kind}: {count}' for kind, count in sent.items())})")
+    print(f"received:    {queue_stats['submitted']} (lost in transport: {total_sent - queue_stats['submitted']})")
+    print(f"fired:       {queue_stats['fired']} in {elapsed:.2f} s = {queue_stats['fired'] / elapsed:.2f} cues/s")
+    print(f"no-ops:      {queue_stats['skipped']} (past the first or last line)")
+    print(f"dropped:     {queue_stats['dropped']}, coalesced: {queue_stats['coalesced']} (policy: {queue_stats['policy']})")
+    print(f"max depth:   {queue_stats['max_depth']}{'' if drained else ' (queue did not drain!)'}")
+    print(f"scene switches seen by OBS: {fake_obs.request_counts['SetCurrentProgramScene']}")
+    print()
+    print(f"{'latency (ms)':<52} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for name in REPORTED_STATS + tuple(name for name in stats["latency"] if name.startswith("obs.")):
+        summary = stats["latency"].get(name)
+        if not summary or "p50_ms" not in summary:
+            continue
+        print(f"{name:<52} {summary['count']:>6} {summary['p50_ms']:>9.2f} {summary['p95_ms']:>9.2f} "
+              f"{summary['p99_ms']:>9.2f} {summary['max_ms']:>9.2f}")
+
+    if args.max_p95_ms is not None:
+        p95 = stats["latency"].get("cue.total", {}).get("p95_ms")
+        if p95 is None or p95 > args.max_p95_ms:
+            print(f"\nFAIL: cue.total p95 {p95} ms is above {args.max_p95_ms} ms")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=2.0, help="cues per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load")
+    parser.add_argument("--mix", type=parse_mix, default={"next": 8, "previous": 1, "jump": 1})
+    parser.add_argument("--lines", type=int, default=500)
+    parser.add_argument("--policy", default="queue", choices=["queue", "coalesce", "drop"])
+    parser.add_argument("--transition-duration", type=float, default=0.3, help="seconds")
+    parser.add_argument("--transition-jitter", type=float, default=0.05, help="seconds")
+    parser.add_argument("--response-delay", type=float, default=0.0, help="simulated network round-trip in seconds")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-p95-ms", type=float, default=None)
+    sys.exit(run(parser.parse_args()))
@@ -0,0 +1,54 @@
+"""
+Micro-benchmark for the line state repaint on a cue.
+
+Compares repainting every row (what the GUI did before LineStates) with the incremental
+update, for growing script sizes. Run from the repository root:
+
+    python -m benchmarks.line_states
+"""
+import argparse
+import time
+from line_states import LineStates
+
+
+def full_repaint(line_count, cues):
+    repaints = 0
+    painted = [None] * line_count
+    for active_index in range(cues):
+        for index in range(line_count):
+            if index == active_index:
+                painted[index] = "active"
+            elif index == active_index + 1:
+                painted[index] = "preview"
+            else:
+                painted[index] = None
+            repaints += 1
+    return repaints
+
+
+def incremental_repaint(line_count, cues):
+    line_states = LineStates()
+    repaints = 0
+    for active_index in range(cues):
+        repaints += len(line_states.update(active_index, line_count))
+    return repaints
+
+
+def measure(func, line_count, cues):
+    start = time.perf_counter()
+    repaints = func(line_count, cues)
+    return (time.perf_counter() - start) / cues, repaints / cues
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cues", type=int, default=200)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'lines':>8}  {'full (us/cue)':>14}  {'rows':>8}  {'incremental (us/cue)':>21}  {'rows':>5}")
+    for line_count in args.sizes:
+        full_time, full_rows = measure(full_repaint, line_count, args.cues)
+        incremental_time, incremental_rows = measure(incremental_repaint, line_count, args.cues)
+        print(f"{line_count:>8}  {full_time * 1e6:>14.1f}  {full_rows:>8.0f}  "
+              f"{incremental_time * 1e6:>21.2f}  {incremental_rows:>5.1f}")
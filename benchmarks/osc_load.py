@@ -0,0 +1,74 @@
+"""
+Sends OSC cues to a running text switcher at a fixed rate, e.g.
+
+    python -m benchmarks.osc_load --rate 5 --duration 30 --mix next=8,previous=1,jump=1
+"""
+import argparse
+import random
+import time
+from collections import Counter
+from pythonosc.udp_client import SimpleUDPClient
+import config
+
+CUE_KINDS = ("next", "previous", "jump", "hide")
+
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(","):
+        kind, _, weight = item.partition("=")
+        if kind not in CUE_KINDS:
+            raise argparse.ArgumentTypeError(f"Unknown cue kind '{kind}', expected one of {', '.join(CUE_KINDS)}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+class OSCLoadGenerator:
+    def __init__(self, host=config.OSC_LISTEN_HOST, port=config.OSC_LISTEN_PORT, rate=5.0, mix=None,
+                 line_count=100, seed=None):
+        self.client = SimpleUDPClient(host, port)
+        self.rate = rate
+        self.mix = mix or {"next": 1}
+        self.line_count = line_count
+        self.random = random.Random(seed)
+        self.sent = Counter()
+
+    def send(self, kind):
+        if kind == "next":
+            self.client.send_message("/obstext/next", [])
+        elif kind == "previous":
+            self.client.send_message("/obstext/previous", [])
+        elif kind == "jump":
+            self.client.send_message("/obstext/next", self.random.randrange(self.line_count))
+        elif kind == "hide":
+            self.client.send_message("/obstext/hide", [])
+        self.sent[kind] += 1
+
+    def run(self, duration):
+        """
+        Sends cues for duration seconds. Deadlines are absolute, so a late send doesn't shift the following ones.
+        """
+        kinds = list(self.mix)
+        weights = [self.mix[kind] for kind in kinds]
+        interval = 1 / self.rate
+        start_time = next_time = time.monotonic()
+        while next_time < start_time + duration:
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.send(self.random.choices(kinds, weights)[0])
+            next_time += interval
+        return self.sent
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=config.OSC_LISTEN_HOST)
+    parser.add_argument("--port", type=int, default=config.OSC_LISTEN_PORT)
+    parser.add_argument("--rate", type=float, default=5.0, help="cues per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--mix", type=parse_mix, default={"next": 1}, help="weighted cue kinds, e.g. next=8,jump=1")
+    parser.add_argument("--lines", type=int, default=100, help="highest line index + 1 for jumps")
+    args = parser.parse_args()
+    sent = OSCLoadGenerator(args.host, args.port, args.rate, args.mix, args.lines).run(args.duration)
+    print(", ".join(f"{kind}: {count}" for kind, count in sent.items()))
@@ -0,0 +1,65 @@
+"""
+Micro-benchmark for the script search index behind /obstext/goto and the find box.
+
+Measures exact, prefix and fuzzy lookups and single line edits on generated scripts
+of growing size. Run from the repository root:
+
+    python -m benchmarks.search
+"""
+import argparse
+import random
+import time
+from script_search import ScriptIndex
+
+LETTERS = "etaoinshrdlcumwfgypbvkjxqz"
+
+
+def make_lines(line_count, rng):
+    # Letter and word frequencies roughly follow those of English text
+    letter_weights = [1 / (rank + 2) for rank in range(len(LETTERS))]
+    words = ["".join(rng.choices(LETTERS, letter_weights, k=rng.randint(2, 9))) for _ in range(5000)]
+    word_weights = [1 / (rank + 1) for rank in range(len(words))]
+    return [" ".join(rng.choices(words, word_weights, k=rng.randint(3, 10))) for _ in range(line_count)]
+
+
+def typo(text, rng):
+    index = rng.randrange(len(text))
+    return text[:index] + text[index + 1:]
+
+
+def measure(func, queries):
+    start = time.perf_counter()
+    for query in queries:
+        func(query)
+    return (time.perf_counter() - start) / len(queries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'lines':>8}  {'build (ms)':>10}  {'exact (us)':>10}  {'prefix (us)':>11}  {'fuzzy (us)':>10}  "
+          f"{'edit (us)':>9}")
+    for line_count in args.sizes:
+        rng = random.Random(args.seed)
+        lines = make_lines(line_count, rng)
+        start = time.perf_counter()
+        index = ScriptIndex(lines)
+        build_time = time.perf_counter() - start
+
+        samples = rng.choices(lines, k=args.queries)
+        exact_time = measure(index.search, samples)
+        prefix_time = measure(index.search, [sample[:len(sample) // 2] for sample in samples])
+        fuzzy_time = measure(index.search, [typo(typo(sample, rng), rng) for sample in samples])
+
+        def edit(text):
+            line_index = rng.randrange(line_count)
+            index.remove(line_index)
+            index.insert(line_index, text)
+
+        edit_time = measure(edit, samples)
+        print(f"{line_count:>8}  {build_time * 1e3:>10.1f}  {exact_time * 1e6:>10.1f}  {prefix_time * 1e6:>11.1f}  "
+              f"{fuzzy_time * 1e6:>10.1f}  {edit_time * 1e6:>9.1f}")
@@ -5,5 +5,37 @@ OBS_WS_HOST = "127.0.0.1"
 OBS_WS_PORT = 4455
 OBS_WS_PASSWORD = ""
 OBS_TRANSITION_TIMEOUT = 5  # seconds
+OBS_TRANSITION_MARGIN = 0.5  # seconds beyond the transition's duration that cues wait for SceneTransitionEnded
+OBS_CONNECT_TIMEOUT = 3  # seconds
+OBS_RECONNECT_MIN_DELAY = 0.5  # seconds, doubled after every failed attempt
+OBS_RECONNECT_MAX_DELAY = 10  # seconds
+OBS_PRESTAGE_TEXT = False  # write the upcoming line into the off-air scene ahead of the cue
+OBS_MAX_IN_FLIGHT = 8  # requests sent on one connection without an answer yet, further ones wait for a slot
+# Other OBS instances (e.g. a hot standby) that get every cue as well, as (host, port, password) tuples.
+# They use the same scene and source names and are cued on their own threads, so they never hold up the main one.
+OBS_MIRRORS = []
 
-MAX_FILE_LINES = 200
+SETTINGS_CACHE_PATH = "settings_cache.json"  # local copy of the settings stored in OBS, used until OBS answers
+SETTINGS_SAVE_DELAY = 1.0  # seconds, settings changes are written to OBS after they settled for this long
+SETTINGS_LOAD_TIMEOUT = 5  # seconds the headless mode waits for the settings from OBS if none are cached
+
+# Independent texts (e.g. subtitles, lower third, ticker), each with its own scenes, sources and script.
+# They are cued with /obstext/<channel>/next etc., the first one also with /obstext/next.
+TEXT_CHANNELS = ["main"]
+
+CUE_QUEUE_POLICY = "queue"  # what happens to OSC cues during a transition: "queue", "coalesce" or "drop"
+CUE_QUEUE_MAX_PENDING = 32
+CUE_TIMER_ARM_LEAD = 0.5  # seconds, the text of a timed (bundle timetag or delay) cue is staged in OBS this early
+CUE_TIMER_SPIN = 0.002  # seconds before a timed cue that are spent spinning instead of waiting, for precision
+
+LATENCY_STATS_ENABLED = False  # per-cue latency histograms, queried with /obstext/stats
+LATENCY_STATS_WINDOW = 1000  # samples per histogram
+LATENCY_STATS_DUMP_PATH = None  # e.g. "stats.json" to write the stats periodically
+LATENCY_STATS_DUMP_INTERVAL = 10  # seconds
+
+MAX_FILE_LINES = 0  # 0 loads the whole script
+SCRIPT_JOURNAL_ENABLED = True  # log unsaved line edits to <script>.journal, they are recovered after a crash
+
+SUBTITLE_EXTENSIONS = (".srt", ".vtt")  # timed scripts, played with /obstext/start, /obstext/pause and /obstext/seek
+SUBTITLE_MIN_GAP = 0.2  # seconds, shorter gaps between subtitles don't hide the text
+SUBTITLE_PARSE_AHEAD = 10  # seconds of subtitles parsed ahead of the playback position
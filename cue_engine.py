@@ -0,0 +1,318 @@
+import os
+import time
+import itertools
+import threading
+import config
+from cue_scheduler import CueScheduler, SKIPPED
+from latency import stats, StatsDumper, LatencyEstimate
+from subtitles import SubtitlePlayer
+from script_search import ScriptIndex
+from cue_table import CueTable
+from script_journal import ScriptJournal, INSERT, REMOVE, EDIT
+
+
+class CueEngine:
+    """
+    Script, cursor and cue logic without any GUI. The wx frame and the headless entry point both drive one of these.
+    Cues are executed on the CueScheduler worker thread, so the listeners are called from that thread too.
+    """
+
+    def __init__(self, obs_text_switcher, cue_policy=config.CUE_QUEUE_POLICY,
+                 stats_dump_path=config.LATENCY_STATS_DUMP_PATH):
+        self.obs_text_switcher = obs_text_switcher
+        # lines and active_index are read and committed by the cue worker thread as well
+        self.script_lock = threading.Lock()
+        self.lines = []
+        self.active_index = -1
+        self.current_path = None  # the script file, it is only opened to load and save it
+        self.journal = None  # unsaved edits of the script file, see ScriptJournal
+        self.recovered_edits = 0  # edits the journal of the last loaded script recovered
+        self.file_dirty = False
+        self.subtitle_player = None  # plays timed scripts
+        self.search_index = ScriptIndex()  # kept up to date with lines by every method that changes them
+        self.cue_table = CueTable(obs_text_switcher.compile_text, obs_text_switcher.get_targets)  # likewise
+
+        self.active_line_listeners = []  # called without arguments after a line went on air
+        self.lines_added_listeners = []  # called without arguments after a timed script appended parsed lines
+        self.error_listeners = []  # called with the exception of a failed cue
+
+        self.cue_scheduler = CueScheduler(self.fire_cue, obs_text_switcher.is_busy,
+                                          lambda: self.active_index, policy=cue_policy)
+        self.last_fired_cue = None
+        self.cue_latency = LatencyEstimate()  # from firing a cue until OBS executed it
+        obs_text_switcher.transition_ended_listeners.append(self._transition_ended)
+        # Cues submitted while OBS was disconnected are buffered by the scheduler (depending on its policy)
+        obs_text_switcher.connected_listeners.append(self.cue_scheduler.notify_ready)
+
+        self.stats_dumper = None
+        if stats_dump_path:
+            self.stats_dumper = StatsDumper(stats_dump_path, config.LATENCY_STATS_DUMP_INTERVAL, self.get_stats)
+
+    def stop(self):
+        self.cue_scheduler.stop()
+        if self.subtitle_player is not None:
+            self.subtitle_player.stop()
+        if self.stats_dumper is not None:
+            self.stats_dumper.stop()
+
+    def _transition_ended(self):
+        # The scheduler doesn't fire while a transition runs, so this transition belongs to the last fired cue
+        cue, self.last_fired_cue = self.last_fired_cue, None
+        if cue is not None and stats.enabled:
+            if cue.done_time is not None:
+                stats.record_since("cue.obs_to_transition_end", cue.done_time)
+            stats.record_since("cue.total", cue.submit_time)
+        self.cue_scheduler.notify_ready()
+
+    def get_stats(self):
+        result = dict(latency=stats.summary(), queue=self.cue_scheduler.get_stats(),
+                      instances=self.obs_text_switcher.get_instance_stats(), cue_table=self.cue_table.get_stats())
+        if self.subtitle_player is not None:
+            result["playback"] = self.subtitle_player.get_state()
+        return result
+
+    def load_file_from_path(self, path):
+        self.close_file()
+        if path.lower().endswith(config.SUBTITLE_EXTENSIONS):
+            self.load_subtitles_from_path(path)
+            return
+        with open(path, encoding="utf8") as file:
+            lines = file
+            if config.MAX_FILE_LINES > 0:
+                lines = itertools.islice(lines, config.MAX_FILE_LINES)
+            lines = [line.removesuffix("\n") for line in lines]
+        self.current_path = path
+        if config.SCRIPT_JOURNAL_ENABLED:
+            self.journal = ScriptJournal(path)
+            self.recovered_edits = self.journal.recover(lines)
+        with self.script_lock:
+            self.lines = lines
+            self.active_index = -1
+            # Indexing a long script takes seconds, cues and edits must not wait for it
+            self.search_index.rebuild_in_background(lines)
+            self.cue_table.rebuild(len(lines))
+        self.update_upcoming_text()
+        # Recovered edits are still unsaved
+        self.file_dirty = self.recovered_edits > 0
+
+    def load_subtitles_from_path(self, path):
+        """
+        Loads a timed script, which is then played with play(), pause() and seek() instead of being cued line by line.
+        The subtitle file itself is never written to, saving writes the lines to a new plain text file.
+        """
+        self.close_file()
+        with self.script_lock:
+            self.lines = []
+            self.active_index = -1
+            self.search_index.rebuild([])
+            self.cue_table.rebuild(0)
+        self.subtitle_player = SubtitlePlayer(self, open(path, encoding="utf-8-sig"))
+        self.update_upcoming_text()
+        self.file_dirty = False
+
+    def open_new_file(self, path):
+        """
+        Makes path the script file the lines are saved to (Save as).
+        """
+        if self.journal is not None:
+            self.journal.discard()
+            self.journal = None
+        self.current_path = path
+        if config.SCRIPT_JOURNAL_ENABLED:
+            self.journal = ScriptJournal(path)
+
+    def save_current_file(self):
+        """
+        Writes the lines to a temporary file next to the script and renames it over the script, so a crash
+        in between leaves the old version intact. The journal is discarded once the new version is in place.
+        """
+        if self.current_path is None:
+            raise IOError("There is no file currently opened")
+        temp_path = f"{self.current_path}.tmp"
+        with self.script_lock:
+            lines = list(self.lines)
+        with open(temp_path, "w", encoding="utf8") as file:
+            for line in lines:
+                file.write(line)
+                file.write("\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.current_path)
+        if self.journal is not None:
+            self.journal.discard()
+        self.file_dirty = False
+
+    def close_file(self):
+        # Unsaved edits are given up, the caller asked about saving them
+        if self.journal is not None:
+            self.journal.discard()
+            self.journal = None
+        self.current_path = None
+        self.recovered_edits = 0
+        if self.subtitle_player is not None:
+            self.subtitle_player.stop()
+            self.subtitle_player = None
+
+    def play(self):
+        if self.subtitle_player is not None:
+            self.subtitle_player.play()
+
+    def pause(self):
+        if self.subtitle_player is not None:
+            self.subtitle_player.pause()
+
+    def seek(self, position):
+        if self.subtitle_player is not None:
+            self.subtitle_player.seek(position)
+
+    def insert_line(self, text="", before_index=None):
+        """
+        Inserts a line before before_index (or at the end) and returns its index.
+        """
+        with self.script_lock:
+            index = len(self.lines) if before_index is None or before_index < 0 else before_index
+            self.lines.insert(index, text)
+            self.search_index.insert(index, text)
+            self.cue_table.insert(index)
+            # The active line stays active when a line is inserted above it
+            if index <= self.active_index:
+                self.active_index += 1
+        self._record_edit(INSERT, index, text)
+        self.update_upcoming_text()
+        self.file_dirty = True
+        return index
+
+    def remove_line(self, index):
+        with self.script_lock:
+            if index < 0 or index >= len(self.lines):
+                return False
+            del self.lines[index]
+            self.search_index.remove(index)
+            self.cue_table.remove(index)
+            if index < self.active_index:
+                self.active_index -= 1
+            if self.active_index >= len(self.lines):
+                self.active_index = len(self.lines) - 1
+        self._record_edit(REMOVE, index)
+        self.update_upcoming_text()
+        self.file_dirty = True
+        return True
+
+    def set_line_text(self, index, text):
+        with self.script_lock:
+            if self.lines[index] == text:
+                return
+            self.lines[index] = text
+            self.search_index.update(index, text)
+            self.cue_table.update(index)
+        self._record_edit(EDIT, index, text)
+        if index == self.active_index + 1:
+            self.update_upcoming_text()
+        self.file_dirty = True
+
+    def _record_edit(self, op, index, text=None):
+        if self.journal is not None:
+            self.journal.record(op, index, text)
+
+    def append_lines(self, lines):
+        with self.script_lock:
+            upcoming_added = self.active_index + 1 == len(self.lines)
+            self.lines.extend(lines)
+            self.search_index.append(lines)
+            self.cue_table.append(len(lines))
+        if upcoming_added:
+            self.update_upcoming_text()
+        for listener in self.lines_added_listeners:
+            listener()
+
+    def clear_lines(self):
+        with self.script_lock:
+            self.lines = []
+            self.active_index = -1
+            self.search_index.rebuild([])
+            self.cue_table.rebuild(0)
+
+    def find_lines(self, query, limit=10):
+        """
+        Returns up to limit (line index, match kind) tuples for the query, see ScriptIndex.search.
+        Of equally good matches, the ones after the active line come first.
+        """
+        return self.search_index.search(query, limit, after_index=self.active_index)
+
+    def find_line(self, query):
+        results = self.find_lines(query, 1)
+        return results[0][0] if results else None
+
+    def update_upcoming_text(self):
+        with self.script_lock:
+            upcoming_index = self.active_index + 1
+            text = self.lines[upcoming_index] if upcoming_index < len(self.lines) else None
+            if text is not None and self.obs_text_switcher.is_configured():
+                # Compiled ahead, so the likely next cue is only a lookup
+                self.cue_table.get(upcoming_index, text)
+        self.obs_text_switcher.set_upcoming_text(text)
+
+    def switch_to_line_index(self, line_index):
+        self.cue_scheduler.submit_line(line_index)
+
+    def next_line(self):
+        self.cue_scheduler.submit_next()
+
+    def prev_line(self):
+        self.cue_scheduler.submit_previous()
+
+    def hide_text(self):
+        self.cue_scheduler.submit_hide()
+
+    # Arming stages the text of a cue that is known to come (e.g. a timed one), so firing it is just the scene switch
+
+    def arm_line(self, line_index):
+        with self.script_lock:
+            if line_index < 0 or line_index >= len(self.lines):
+                return
+            text = self.lines[line_index]
+        self.obs_text_switcher.arm_text(text)
+
+    def arm_hide_text(self):
+        self.obs_text_switcher.arm_text("")
+
+    def fire_cue(self, cue):
+        # Runs on the cue worker thread, which is the only one sending cues to OBS
+        if not self.obs_text_switcher.is_configured():
+            # No scenes and sources selected, there is nothing to switch
+            return SKIPPED
+        try:
+            if cue.line_index is None:
+                text = ""
+                compiled = None
+            else:
+                with self.script_lock:
+                    if cue.line_index < 0 or cue.line_index >= len(self.lines):
+                        return SKIPPED
+                    text = self.lines[cue.line_index]
+                    compiled = self.cue_table.get(cue.line_index, text)
+
+            self.last_fired_cue = cue
+            fired = self.obs_text_switcher.switch_text(text, compiled, cue.sequence)
+            cue.done_time = time.monotonic()
+            if stats.enabled:
+                stats.record("cue.fire", cue.done_time - cue.fire_time)
+            if not fired:
+                self.last_fired_cue = None
+                # Only ask the scheduler to retry if a transition or a disconnect got in the way
+                return not self.obs_text_switcher.is_busy()
+            self.cue_latency.add(cue.done_time - cue.fire_time)
+            if cue.line_index is not None:
+                with self.script_lock:
+                    self.active_index = cue.line_index
+                self.update_upcoming_text()
+                for listener in self.active_line_listeners:
+                    listener()
+        except Exception as e:
+            self.last_fired_cue = None
+            if not self.obs_text_switcher.is_connected():
+                # The connection was lost during the cue, it is fired again after the reconnect
+                return False
+            for listener in self.error_listeners:
+                listener(e)
+        return True
@@ -0,0 +1,162 @@
+import time
+import itertools
+import threading
+import logging
+from collections import deque
+from config import CUE_QUEUE_POLICY, CUE_QUEUE_MAX_PENDING
+from latency import stats
+
+LOG = logging.getLogger(__name__)
+
+POLICY_QUEUE = "queue"        # fire every cue in order
+POLICY_COALESCE = "coalesce"  # only fire the latest target
+POLICY_DROP = "drop"          # ignore cues while a transition is running
+
+SKIPPED = "skipped"  # returned by fire for cues with nothing to do, e.g. past the last line
+
+BUSY_POLL_INTERVAL = 0.1  # seconds, in case a SceneTransitionEnded event never arrives
+WAIT_TIME_HISTORY = 1000
+
+CUE_SEQUENCE = itertools.count()
+
+
+class Cue:
+    def __init__(self, line_index):
+        self.line_index = line_index  # None hides the text
+        self.sequence = next(CUE_SEQUENCE)  # stays the same when the cue is retried
+        self.submit_time = time.monotonic()  # the OSC handler submits right after receiving the packet
+        self.fire_time = None
+        self.done_time = None
+
+    def __repr__(self):
+        return f"<Cue {'hide' if self.line_index is None else self.line_index}>"
+
+
+class CueScheduler(threading.Thread):
+    """
+    Bounded cue queue with a worker thread that is the only place cues are sent to OBS from.
+    Cues are held back while OBS is busy (in a transition or disconnected) and fired as soon as it isn't.
+    fire(cue) executes a cue and returns False if it couldn't because OBS was busy after all (SKIPPED if there
+    was nothing to do),
+    is_busy() tells if cues have to wait and get_active_index() returns the line that is on air.
+    """
+
+    def __init__(self, fire, is_busy, get_active_index, policy=CUE_QUEUE_POLICY, max_pending=CUE_QUEUE_MAX_PENDING):
+        super().__init__(name="CueScheduler", daemon=True)
+        if policy not in (POLICY_QUEUE, POLICY_COALESCE, POLICY_DROP):
+            raise ValueError(f"Unknown cue queue policy: {policy}")
+        self.fire = fire
+        self.is_busy = is_busy
+        self.get_active_index = get_active_index
+        self.policy = policy
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.firing_cue = None
+        self.condition = threading.Condition()
+        self.running = True
+
+        self.submitted = 0
+        self.fired = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.wait_times = deque(maxlen=WAIT_TIME_HISTORY)
+        self.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
+    def _last_target_index(self):
+        for cue in reversed(self.pending):
+            if cue.line_index is not None:
+                return cue.line_index
+        if self.firing_cue is not None and self.firing_cue.line_index is not None:
+            return self.firing_cue.line_index
+        return self.get_active_index()
+
+    def get_target_index(self):
+        """
+        Returns the line the last queued cue goes to, which next and previous cues are relative to.
+        """
+        with self.condition:
+            return self._last_target_index()
+
+    def submit_line(self, line_index):
+        return self.submit(Cue(line_index))
+
+    def submit_next(self):
+        with self.condition:
+            return self.submit(Cue(self._last_target_index() + 1))
+
+    def submit_previous(self):
+        with self.condition:
+            return self.submit(Cue(self._last_target_index() - 1))
+
+    def submit_hide(self):
+        return self.submit(Cue(None))
+
+    def submit(self, cue):
+        """
+        Returns False if the cue was dropped.
+        """
+        with self.condition:
+            self.submitted += 1
+            if self.policy == POLICY_DROP and (self.pending or self.is_busy()):
+                self.dropped += 1
+                return False
+            if self.policy == POLICY_COALESCE and self.pending:
+                self.coalesced += len(self.pending)
+                self.pending.clear()
+            if len(self.pending) >= self.max_pending:
+                LOG.warning("Cue queue is full, dropping %s", cue)
+                self.dropped += 1
+                return False
+            self.pending.append(cue)
+            self.max_depth = max(self.max_depth, len(self.pending))
+            self.condition.notify()
+            return True
+
+    def notify_ready(self):
+        # After a transition ended or OBS reconnected
+        with self.condition:
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and (not self.pending or self.is_busy()):
+                    self.condition.wait(BUSY_POLL_INTERVAL if self.pending else None)
+                if not self.running:
+                    return
+                cue = self.firing_cue = self.pending.popleft()
+
+            cue.fire_time = time.monotonic()
+            stats.record("cue.queue_wait", cue.fire_time - cue.submit_time)
+            try:
+                fired = self.fire(cue)
+            except Exception:
+                LOG.exception("Could not fire %s", cue)
+                fired = True  # don't retry cues that failed
+
+            with self.condition:
+                self.firing_cue = None
+                if not fired:
+                    # OBS was busy after all, keep the cue at the front
+                    self.pending.appendleft(cue)
+                    continue
+                if fired == SKIPPED:
+                    self.skipped += 1
+                    continue
+                self.fired += 1
+                self.wait_times.append(time.monotonic() - cue.submit_time)
+
+    def get_stats(self):
+        with self.condition:
+            wait_times = list(self.wait_times)
+            return dict(policy=self.policy, depth=len(self.pending), max_depth=self.max_depth,
+                        submitted=self.submitted, fired=self.fired, skipped=self.skipped, dropped=self.dropped, coalesced=self.coalesced,
+                        wait_avg_ms=sum(wait_times) / len(wait_times) * 1000 if wait_times else 0.0,
+                        wait_max_ms=max(wait_times, default=0.0) * 1000)
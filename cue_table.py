@@ -0,0 +1,59 @@
+import threading
+
+
+class CueTable:
+    """
+    The script compiled for firing: per line, whatever compile(text) returns for the current scene/source selection
+    (the pre-encoded OBS requests, see OBSTextSwitcher.compile_text), so firing a cue is a lookup instead of
+    building and encoding requests. Entries are compiled on first use or ahead with get(), and only invalidated
+    when their line changes or get_key() (the selection) returns something else.
+    It is kept in line with the script by the same engine methods that keep the search index up to date.
+    """
+
+    def __init__(self, compile, get_key):
+        self.compile = compile
+        self.get_key = get_key
+        self.lock = threading.Lock()
+        self.entries = []  # line index -> compiled line or None
+        self.key = None
+        self.compiled = 0
+
+    def rebuild(self, line_count):
+        with self.lock:
+            self.entries = [None] * line_count
+
+    def insert(self, index):
+        with self.lock:
+            self.entries.insert(index, None)
+
+    def append(self, count):
+        with self.lock:
+            self.entries.extend([None] * count)
+
+    def remove(self, index):
+        with self.lock:
+            del self.entries[index]
+
+    def update(self, index):
+        with self.lock:
+            self.entries[index] = None
+
+    def get(self, index, text):
+        """
+        Returns the compiled entry of the line at index, compiling text if it isn't up to date.
+        """
+        key = self.get_key()
+        with self.lock:
+            if key != self.key:
+                self.entries = [None] * len(self.entries)
+                self.key = key
+            entry = self.entries[index]
+            if entry is None:
+                entry = self.entries[index] = self.compile(text)
+                self.compiled += 1
+            return entry
+
+    def get_stats(self):
+        with self.lock:
+            return dict(lines=len(self.entries), cached=sum(entry is not None for entry in self.entries),
+                        compiled=self.compiled)
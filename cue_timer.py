@@ -0,0 +1,89 @@
+import heapq
+import itertools
+import time
+import threading
+import logging
+from collections import deque
+from config import CUE_TIMER_ARM_LEAD, CUE_TIMER_SPIN
+from latency import stats
+
+LOG = logging.getLogger(__name__)
+
+JITTER_HISTORY = 1000
+
+
+class CueTimer(threading.Thread):
+    """
+    Calls cue callbacks at monotonic deadlines. All timed cues share this thread and one heap
+    instead of sleeping per message. The last CUE_TIMER_SPIN seconds before a deadline are spent spinning,
+    because a wait can wake up a scheduler tick late. The jitter is how late the callbacks were called.
+    """
+
+    def __init__(self, arm_lead=CUE_TIMER_ARM_LEAD, spin=CUE_TIMER_SPIN):
+        super().__init__(name="CueTimer", daemon=True)
+        self.arm_lead = arm_lead
+        self.spin = spin
+        self.heap = []  # (due time, sequence number, callback, precise)
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.running = True
+
+        self.scheduled = 0
+        self.fired = 0
+        self.jitter = deque(maxlen=JITTER_HISTORY)
+        self.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.heap.clear()
+            self.condition.notify()
+
+    def schedule(self, due_time, callback, arm=None):
+        """
+        Calls callback at due_time (time.monotonic()) and arm arm_lead seconds before, or right away
+        if that is already over. arm should prepare everything so callback has as little left to do as possible.
+        """
+        with self.condition:
+            self.scheduled += 1
+            heapq.heappush(self.heap, (due_time, next(self.sequence), callback, True))
+            if arm is not None:
+                heapq.heappush(self.heap, (due_time - self.arm_lead, next(self.sequence), arm, False))
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running:
+                    if self.heap:
+                        due_time, _, _, precise = self.heap[0]
+                        delay = due_time - time.monotonic() - (self.spin if precise else 0)
+                        if delay <= 0:
+                            break
+                        self.condition.wait(delay)
+                    else:
+                        self.condition.wait()
+                if not self.running:
+                    return
+                due_time, _, callback, precise = heapq.heappop(self.heap)
+
+            if precise:
+                while time.monotonic() < due_time:
+                    pass
+                late = time.monotonic() - due_time
+                stats.record("cue.timer_jitter", late)
+            try:
+                callback()
+            except Exception:
+                LOG.exception("Timed cue failed")
+            if precise:
+                with self.condition:
+                    self.fired += 1
+                    self.jitter.append(late)
+
+    def get_stats(self):
+        with self.condition:
+            jitter = list(self.jitter)
+            return dict(pending=sum(1 for entry in self.heap if entry[3]), scheduled=self.scheduled, fired=self.fired,
+                        jitter_avg_ms=sum(jitter) / len(jitter) * 1000 if jitter else 0.0,
+                        jitter_max_ms=max(jitter, default=0.0) * 1000)
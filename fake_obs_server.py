@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import random
+import secrets
+import threading
+from collections import Counter
+import websockets
+
+LOG = logging.getLogger(__name__)
+
+TEXT_INPUT_KIND = "text_gdiplus_v2"
+
+
+class FakeOBSServer:
+    """
+    Minimal in-process obs-websocket v5 server for testing the switcher without OBS.
+    It knows the requests used by obs_text.py and emits the matching events.
+    Needs the websockets package from requirements-dev.txt.
+    """
+
+    def __init__(self, host="127.0.0.1", port=4455, password="", transition_duration=0.3, transition_jitter=0.0,
+                 response_delay=0.0, settings_echo_delay=0.005, seed=None):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.transition_duration = transition_duration
+        self.transition_jitter = transition_jitter  # seconds, added or subtracted at random
+        self.response_delay = response_delay  # seconds, simulates the network round-trip
+        # seconds after the response that InputSettingsChanged follows, OBS also defers it for video sources
+        self.settings_echo_delay = settings_echo_delay
+        self.random = random.Random(seed)
+        self.scenes = {"Text 1": ["Text Source 1"], "Text 2": ["Text Source 2"]}
+        self.inputs = {"Text Source 1": {"text": ""}, "Text Source 2": {"text": ""}}
+        self.program_scene = "Text 1"
+        self.studio_mode = False
+        self.persistent_data = {}
+        self.request_counts = Counter()
+        self.clients = set()
+        self.tasks = set()  # delayed responses and events, cancelled when the server stops
+        self.server = None
+        self.loop = None
+        self.thread = None
+
+    async def start(self):
+        self.server = await websockets.serve(self._handle_client, self.host, self.port, compression=None)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        for task in list(self.tasks):
+            task.cancel()
+        self.server.close()
+        await self.server.wait_closed()
+
+    def start_in_thread(self):
+        """
+        Runs the server on its own event loop thread, for use from synchronous code. Returns once it listens.
+        """
+        started = threading.Event()
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            self.loop.run_until_complete(self.start())
+            started.set()
+            self.loop.run_forever()
+            self.loop.close()
+
+        self.thread = threading.Thread(target=run, name="FakeOBSServer", daemon=True)
+        self.thread.start()
+        started.wait()
+
+    def stop_thread(self):
+        if self.thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.thread = None
+
+    async def serve_forever(self):
+        await self.start()
+        LOG.info("Fake OBS listening on ws://%s:%s", self.host, self.port)
+        await self.server.serve_forever()
+
+    async def _handle_client(self, ws):
+        hello = {"obsWebSocketVersion": "5.0.0-fake", "rpcVersion": 1}
+        salt = challenge = None
+        if self.password:
+            salt, challenge = secrets.token_urlsafe(16), secrets.token_urlsafe(16)
+            hello["authentication"] = {"salt": salt, "challenge": challenge}
+        await ws.send(json.dumps({"op": 0, "d": hello}))
+
+        identify = json.loads(await ws.recv())
+        if identify.get("op") != 1:
+            await ws.close(4007, "Not identified")
+            return
+        if self.password and identify["d"].get("authentication") != self._expected_auth(salt, challenge):
+            await ws.close(4009, "Authentication failed")
+            return
+        await ws.send(json.dumps({"op": 2, "d": {"negotiatedRpcVersion": 1}}))
+
+        self.clients.add(ws)
+        try:
+            async for message in ws:
+                if self.response_delay:
+                    # Like OBS, keep reading while earlier requests are still being answered
+                    self._run_later(self._respond(ws, json.loads(message)))
+                else:
+                    await self._respond(ws, json.loads(message))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.clients.discard(ws)
+
+    async def _respond(self, ws, message):
+        if self.response_delay:
+            await asyncio.sleep(self.response_delay)
+        data = message["d"]
+        try:
+            if message["op"] == 6:
+                result = self._execute(data["requestType"], data.get("requestData") or {})
+                await ws.send(json.dumps({"op": 7, "d": {"requestId": data["requestId"], **result}}))
+            elif message["op"] == 8:
+                results = []
+                for request in data["requests"]:
+                    result = self._execute(request["requestType"], request.get("requestData") or {})
+                    results.append(result)
+                    if data.get("haltOnFailure") and not result["requestStatus"]["result"]:
+                        break
+                await ws.send(json.dumps({"op": 9, "d": {"requestId": data["requestId"], "results": results}}))
+        except websockets.ConnectionClosed:
+            pass
+
+    def _expected_auth(self, salt, challenge):
+        secret = base64.b64encode(hashlib.sha256((self.password + salt).encode("utf-8")).digest())
+        return base64.b64encode(hashlib.sha256(secret + challenge.encode("utf-8")).digest()).decode("utf-8")
+
+    def _execute(self, request_type, data):
+        self.request_counts[request_type] += 1
+        handler = getattr(self, f"_request_{request_type}", None)
+        if handler is None:
+            return self._status(request_type, False, 204, "Unknown request type")
+        try:
+            response_data = handler(data)
+        except KeyError as e:
+            return self._status(request_type, False, 600, f"Resource not found: {e}")
+        result = self._status(request_type, True, 100)
+        if response_data is not None:
+            result["responseData"] = response_data
+        return result
+
+    def _status(self, request_type, success, code, comment=None):
+        status = {"result": success, "code": code}
+        if comment is not None:
+            status["comment"] = comment
+        return {"requestType": request_type, "requestStatus": status}
+
+    def _run_later(self, coroutine):
+        task = asyncio.ensure_future(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def broadcast_event(self, event_type, event_data=None):
+        message = json.dumps({"op": 5, "d": {"eventType": event_type, "eventIntent": 1, "eventData": event_data or {}}})
+        for ws in list(self.clients):
+            asyncio.ensure_future(ws.send(message))
+
+    async def _end_transition(self, duration):
+        await asyncio.sleep(duration)
+        self.broadcast_event("SceneTransitionEnded", {"transitionName": "Fade"})
+        self.broadcast_event("SceneTransitionVideoEnded", {"transitionName": "Fade"})
+
+    def _request_GetVersion(self, _):
+        return {"obsVersion": "30.0.0", "obsWebSocketVersion": "5.0.0-fake", "rpcVersion": 1}
+
+    def _request_GetStudioModeEnabled(self, _):
+        return {"studioModeEnabled": self.studio_mode}
+
+    def _request_GetSceneList(self, _):
+        scenes = [{"sceneName": name, "sceneIndex": index} for index, name in enumerate(reversed(list(self.scenes)))]
+        return {"currentProgramSceneName": self.program_scene, "currentPreviewSceneName": None, "scenes": scenes}
+
+    def _request_GetSceneItemList(self, data):
+        sources = self.scenes[data["sceneName"]]
+        return {"sceneItems": [{"sceneItemId": index + 1, "sourceName": name, "inputKind": TEXT_INPUT_KIND}
+                               for index, name in enumerate(reversed(sources))]}
+
+    def _request_GetCurrentProgramScene(self, _):
+        return {"currentProgramSceneName": self.program_scene}
+
+    def _request_SetCurrentProgramScene(self, data):
+        scene_name = data["sceneName"]
+        if scene_name not in self.scenes:
+            raise KeyError(scene_name)
+        self.program_scene = scene_name
+        self.broadcast_event("SceneTransitionStarted", {"transitionName": "Fade"})
+        self.broadcast_event("CurrentProgramSceneChanged", {"sceneName": scene_name})
+        duration = self.transition_duration + self.random.uniform(-self.transition_jitter, self.transition_jitter)
+        self._run_later(self._end_transition(max(0.0, duration)))
+
+    def _request_GetCurrentSceneTransition(self, _):
+        return {"transitionName": "Fade", "transitionKind": "fade_transition", "transitionFixed": False,
+                "transitionDuration": round(self.transition_duration * 1000), "transitionConfigurable": True,
+                "transitionSettings": {}}
+
+    def _request_GetInputSettings(self, data):
+        return {"inputSettings": self.inputs[data["inputName"]], "inputKind": TEXT_INPUT_KIND}
+
+    async def _echo_input_settings(self, input_name, settings):
+        await asyncio.sleep(self.settings_echo_delay)
+        # Like OBS, settings at their default value are left out
+        self.broadcast_event("InputSettingsChanged", {"inputName": input_name,
+                                                      "inputSettings": {key: value for key, value in settings.items()
+                                                                        if value != ""}})
+
+    def _request_SetInputSettings(self, data):
+        input_name = data["inputName"]
+        self.inputs[input_name].update(data.get("inputSettings", {}))
+        self._run_later(self._echo_input_settings(input_name, dict(self.inputs[input_name])))
+
+    def _request_GetPersistentData(self, data):
+        return {"slotValue": self.persistent_data.get((data["realm"], data["slotName"]))}
+
+    def _request_SetPersistentData(self, data):
+        self.persistent_data[(data["realm"], data["slotName"])] = data["slotValue"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake obs-websocket v5 server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4455)
+    parser.add_argument("--password", default="")
+    parser.add_argument("--transition-duration", type=float, default=0.3)
+    parser.add_argument("--transition-jitter", type=float, default=0.0)
+    parser.add_argument("--response-delay", type=float, default=0.0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    server = FakeOBSServer(args.host, args.port, args.password, args.transition_duration, args.transition_jitter,
+                           args.response_delay)
+    asyncio.run(server.serve_forever())
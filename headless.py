@@ -0,0 +1,73 @@
+"""
+Runs the text switcher without the wx GUI, e.g. on a playout machine:
+
+    python -m headless script.txt --script lower=names.txt
+
+The scenes and sources are the ones last selected in the GUI (stored in OBS).
+"""
+import argparse
+import logging
+import threading
+import osc_server
+import config
+from text_channels import TextChannels
+
+LOG = logging.getLogger("headless")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("script", nargs="?", help="text file with one line per cue for the first channel")
+    parser.add_argument("--script", dest="channel_scripts", action="append", default=[], metavar="CHANNEL=PATH",
+                        help="script of another channel from config.TEXT_CHANNELS, can be repeated")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    channel_scripts = {}
+    for item in args.channel_scripts:
+        name, _, path = item.partition("=")
+        if not path:
+            parser.error(f"--script expects CHANNEL=PATH, got '{item}'")
+        channel_scripts[name] = path
+
+    unknown_channels = channel_scripts.keys() - set(config.TEXT_CHANNELS)
+    if unknown_channels:
+        parser.error(f"Unknown channels: {', '.join(sorted(unknown_channels))}")
+
+    channels = TextChannels()
+    if args.script:
+        channel_scripts[channels.default.name] = args.script
+
+    channels.load_settings()
+    for channel in channels:
+        if not channel.obs_text_switcher.is_configured():
+            channel.settings_store.loaded.wait(config.SETTINGS_LOAD_TIMEOUT)
+        if not channel.obs_text_switcher.is_configured():
+            LOG.warning("No scenes and sources selected yet for channel %s, its cues will be ignored until they are "
+                        "set in the GUI", channel.name)
+
+        engine = channel.engine
+        engine.active_line_listeners.append(
+            lambda name=channel.name, engine=engine: LOG.info("%s: line %d on air: %s", name, engine.active_index + 1,
+                                                              engine.lines[engine.active_index]))
+        engine.error_listeners.append(lambda e, name=channel.name: LOG.error("%s: cue failed: %s", name, e))
+        if channel.name in channel_scripts:
+            engine.load_file_from_path(channel_scripts[channel.name])
+            LOG.info("%s: loaded %d lines from %s", channel.name, len(engine.lines), channel_scripts[channel.name])
+
+    server = osc_server.OSCServer(channels.default.engine, channels=channels.get_engines())
+    LOG.info("Listening for OSC on %s:%d", config.OSC_LISTEN_HOST, config.OSC_LISTEN_PORT)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        channels.stop()
+        channels.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import json
+import os
+import time
+import threading
+import logging
+from collections import deque
+from config import LATENCY_STATS_ENABLED, LATENCY_STATS_WINDOW
+
+LOG = logging.getLogger(__name__)
+
+PERCENTILES = (50, 95, 99)
+
+
+class RollingHistogram:
+    """
+    Keeps the last window samples and calculates percentiles from them on demand.
+    """
+
+    def __init__(self, window=LATENCY_STATS_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+
+    def summary(self):
+        samples = sorted(self.samples)
+        if not samples:
+            return dict(count=self.count)
+        summary = dict(count=self.count, window=len(samples), max_ms=samples[-1] * 1000)
+        for percentile in PERCENTILES:
+            index = min(len(samples) - 1, round(percentile / 100 * (len(samples) - 1)))
+            summary[f"p{percentile}_ms"] = samples[index] * 1000
+        return summary
+
+
+class LatencyStats:
+    """
+    Named rolling latency histograms (durations in seconds, summaries in milliseconds).
+    Callers check enabled before taking timestamps, so there is next to no overhead when it is off.
+    """
+
+    def __init__(self, enabled=LATENCY_STATS_ENABLED, window=LATENCY_STATS_WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = RollingHistogram(self.window)
+            histogram.add(seconds)
+
+    def record_since(self, name, start_time):
+        if self.enabled and start_time is not None:
+            self.record(name, time.monotonic() - start_time)
+
+    def summary(self):
+        with self.lock:
+            return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+
+
+class LatencyEstimate:
+    """
+    Exponentially weighted moving average of a latency in seconds. Unlike LatencyStats it is always measured,
+    since it is used to fire cues early by the expected latency.
+    """
+
+    def __init__(self, weight=0.2):
+        self.weight = weight
+        self.value = 0.0
+        self.count = 0
+
+    def add(self, seconds):
+        self.value = seconds if self.count == 0 else self.value + self.weight * (seconds - self.value)
+        self.count += 1
+
+
+class StatsDumper(threading.Thread):
+    """
+    Periodically writes get_stats() as JSON to path (replacing the file, so readers never see half of it).
+    """
+
+    def __init__(self, path, interval, get_stats):
+        super().__init__(name="StatsDumper", daemon=True)
+        self.path = path
+        self.interval = interval
+        self.get_stats = get_stats
+        self.stopped = threading.Event()
+        self.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                temp_path = f"{self.path}.tmp"
+                with open(temp_path, "w", encoding="utf8") as file:
+                    json.dump(self.get_stats(), file, indent=2)
+                os.replace(temp_path, self.path)
+            except OSError:
+                LOG.exception("Could not write the stats to %s", self.path)
+
+
+stats = LatencyStats()
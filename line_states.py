@@ -0,0 +1,46 @@
+ACTIVE = "active"
+PREVIEW = "preview"
+
+
+class LineStates:
+    """
+    Remembers which rows are currently painted as active or preview, so that a cue only
+    has to repaint the rows whose state actually changed instead of every row.
+    """
+
+    def __init__(self):
+        self.painted = {}  # row index -> state
+
+    @staticmethod
+    def get_states(active_index, line_count):
+        states = {}
+        if 0 <= active_index < line_count:
+            states[active_index] = ACTIVE
+        if 0 <= active_index + 1 < line_count:
+            states[active_index + 1] = PREVIEW
+        return states
+
+    def update(self, active_index, line_count):
+        """
+        Returns the rows that need a repaint for the new active index.
+        """
+        states = self.get_states(active_index, line_count)
+        changed = [row for row in self.painted.keys() | states.keys() if self.painted.get(row) != states.get(row)]
+        self.painted = states
+        return sorted(changed)
+
+    def shift(self, index, delta):
+        """
+        Moves the painted rows at or after index by delta after lines were inserted (delta > 0) or removed (delta < 0).
+        Rows that were removed are forgotten.
+        """
+        painted = {}
+        for row, state in self.painted.items():
+            if row < index:
+                painted[row] = state
+            elif delta > 0 or row >= index - delta:
+                painted[row + delta] = state
+        self.painted = painted
+
+    def clear(self):
+        self.painted = {}
@@ -1,10 +1,9 @@
 import sys
 import wx
-import wx.lib.scrolledpanel
 import ctypes
-import obs_text
-import osc_server
-import config
+from line_states import LineStates
+from scene_discovery import SceneDiscovery
+from text_channels import TextChannels
 
 SQUARE_BUTTON_SIZE = wx.Size(40, 40) if sys.platform == "linux" else wx.Size(30, 30)
 
@@ -14,8 +13,14 @@ class TextSwitcherGUI(wx.Frame):
         self.SetMinSize((400, 250))
         self.SetIcon(wx.Icon("icon.ico"))
 
-        self.obs_text_switcher = obs_text.OBSTextSwitcher()
-        self.obs_text_switcher.load_settings()
+        # The window shows one channel at a time, OSC cues all of them
+        self.channels = TextChannels()
+        self.channels.load_settings()
+        self.channel = self.channels.default
+        self.obs_text_switcher = self.channel.obs_text_switcher
+        self.settings_store = self.channel.settings_store
+        self.engine = self.channel.engine
+        self.scene_discovery = SceneDiscovery(self.obs_text_switcher)
 
         self.menu_bar = wx.MenuBar()
         self.file_menu = wx.Menu()
@@ -28,17 +33,62 @@ class TextSwitcherGUI(wx.Frame):
         self.file_menu.Append(self.menu_item_open)
         self.file_menu.Append(self.menu_item_save)
         self.file_menu.Append(self.menu_item_save_as)
+        self.edit_menu = wx.Menu()
+        self.menu_bar.Append(self.edit_menu, "&Edit")
+        self.menu_item_find = wx.MenuItem(self.edit_menu, text="Find...\tCtrl+F", id=wx.ID_FIND)
+        self.edit_menu.Append(self.menu_item_find)
         self.SetMenuBar(self.menu_bar)
+        self.status_bar = self.CreateStatusBar()
+        self.status_bar.SetStatusText("Connecting to OBS...")
 
         self.Bind(wx.EVT_MENU, self.new_file, self.menu_item_new)
         self.Bind(wx.EVT_MENU, self.open_file, self.menu_item_open)
         self.Bind(wx.EVT_MENU, self.save_file, self.menu_item_save)
         self.Bind(wx.EVT_MENU, self.save_file_as, self.menu_item_save_as)
-        
-        self.lines_panel = wx.lib.scrolledpanel.ScrolledPanel(self)
-        self.lines_panel.SetupScrolling()
-        self.lines_panel.SetAutoLayout(True)
-        
+        self.Bind(wx.EVT_MENU, lambda _: self.find_box.SetFocus(), self.menu_item_find)
+
+        for channel in self.channels:
+            # The engines notify from their cue worker threads
+            channel.engine.active_line_listeners.append(lambda channel=channel: wx.CallAfter(self.active_line_changed, channel))
+            channel.engine.error_listeners.append(lambda e: wx.CallAfter(self.show_exception, e))
+            channel.engine.lines_added_listeners.append(lambda channel=channel: wx.CallAfter(self.lines_added, channel))
+        # OBS is connected in the background, cues wait while it isn't
+        self.obs_text_switcher.connected_listeners.append(lambda: wx.CallAfter(self.connection_changed, True))
+        self.obs_text_switcher.disconnected_listeners.append(lambda: wx.CallAfter(self.connection_changed, False))
+        if self.obs_text_switcher.is_connected():
+            self.status_bar.SetStatusText("Connected to OBS")
+        self.line_states = LineStates()
+
+        self.lines_panel = wx.Panel(self)
+        self.lines_list = ScriptListCtrl(self.lines_panel, self)
+
+        # Typing selects the best match, Enter goes to the next one; cueing it is up to the operator
+        self.find_box = wx.SearchCtrl(self.lines_panel, style=wx.TE_PROCESS_ENTER)
+        self.find_box.SetDescriptiveText("Find line")
+        self.find_box.Bind(wx.EVT_TEXT, lambda _: self.find_line())
+        self.find_box.Bind(wx.EVT_TEXT_ENTER, lambda _: self.find_line(next_result=True))
+        self.find_box.Bind(wx.EVT_SEARCHCTRL_SEARCH_BTN, lambda _: self.find_line(next_result=True))
+        self.find_results = []
+        self.find_position = 0
+
+        self.line_buttons_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        self.add_button = wx.Button(self.lines_panel, label="+", size=SQUARE_BUTTON_SIZE)
+        self.add_button.Bind(wx.EVT_BUTTON, lambda _: self.add_new_line(before_index=self.lines_list.get_selected_index()))
+        self.remove_button = wx.Button(self.lines_panel, label="-", size=SQUARE_BUTTON_SIZE)
+        self.remove_button.Bind(wx.EVT_BUTTON, lambda _: self.remove_line(self.lines_list.get_selected_index()))
+        self.go_button = wx.Button(self.lines_panel, label="Go", size=wx.Size(40, SQUARE_BUTTON_SIZE.height))
+        self.go_button.Bind(wx.EVT_BUTTON, lambda _: self.switch_to_line_index(self.lines_list.get_selected_index()))
+        self.line_buttons_sizer.Add(self.add_button)
+        self.line_buttons_sizer.Add(self.remove_button)
+        self.line_buttons_sizer.AddStretchSpacer()
+        self.line_buttons_sizer.Add(self.go_button)
+
+        self.lines_sizer = wx.BoxSizer(wx.VERTICAL)
+        self.lines_sizer.Add(self.find_box, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.TOP, 4)
+        self.lines_sizer.Add(self.lines_list, 1, wx.EXPAND | wx.ALL, 4)
+        self.lines_sizer.Add(self.line_buttons_sizer, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 4)
+        self.lines_panel.SetSizer(self.lines_sizer)
+
         self.control_panel = ControlPanel(self)
 
         self.main_sizer = wx.BoxSizer(wx.HORIZONTAL)
@@ -46,77 +96,76 @@ class TextSwitcherGUI(wx.Frame):
         self.main_sizer.Add(self.control_panel, 2, wx.EXPAND)
         self.SetSizer(self.main_sizer)
 
-        self.scroll_sizer = wx.BoxSizer(wx.VERTICAL)
-        self.lines_panel.SetSizer(self.scroll_sizer)
-        self.add_button = wx.Button(self.lines_panel, label="+", size=SQUARE_BUTTON_SIZE)
-        self.add_button.Bind(wx.EVT_BUTTON, lambda _: self.add_new_line())
-        self.scroll_sizer.Add(self.add_button, 0, wx.EXPAND | wx.ALL, 4)
+        # Started once the window is shown. Only the OSC server waits for that, the OBS modules are needed
+        # to build the window
+        self.osc_server = None
+        wx.CallAfter(self.start_osc_server)
 
-        self.text_lines = []
-        self.active_index = -1
-        self.current_file = None
-        self.file_dirty = False
+        self.Bind(wx.EVT_CLOSE, self.on_close_window)
 
-        self.osc_server = osc_server.OSCServer(self)
+    def start_osc_server(self):
+        import osc_server
+        self.osc_server = osc_server.OSCServer(self.channels.default.engine, channels=self.channels.get_engines())
 
-        self.Bind(wx.EVT_CLOSE, self.on_close_window)
+    def connection_changed(self, connected):
+        self.status_bar.SetStatusText("Connected to OBS" if connected else "Connection to OBS lost, reconnecting...")
     
     def ask_save_file(self):
         dialog = wx.MessageDialog(self, "Do you want to save the current lines?", "Save text?", wx.YES | wx.NO | wx.CANCEL | wx.ICON_QUESTION)
         return dialog.ShowModal()
 
     def on_close_window(self, event):
-        if self.text_lines and self.file_dirty:
-            choice = self.ask_save_file()
-            if choice == wx.ID_CANCEL:
-                return
-            if choice == wx.ID_YES:
-                self.save_file()
-        self.osc_server.shutdown()
+        for channel in self.channels:
+            if channel.engine.lines and channel.engine.file_dirty:
+                self.select_channel(channel)
+                choice = self.ask_save_file()
+                if choice == wx.ID_CANCEL:
+                    return
+                if choice == wx.ID_YES:
+                    self.save_file()
+        if self.osc_server is not None:
+            self.osc_server.shutdown()
+        self.channels.stop()
+        self.scene_discovery.shutdown()
+        self.channels.disconnect()
         event.Skip()
+
+    def select_channel(self, channel):
+        self.channel = channel
+        self.obs_text_switcher = channel.obs_text_switcher
+        self.settings_store = channel.settings_store
+        self.engine = channel.engine
+        self.find_results = []
+        self.line_states.clear()
+        self.lines_list.SetItemCount(len(self.engine.lines))
+        self.lines_list.Refresh()
+        self.update_line_states()
+        self.control_panel.select_channel(channel)
     
     def load_file_from_path(self, path):
-        self.current_file = open(path, "r+", encoding="utf8")
-        self.clear_lines()
-        i = 0
-        for line in self.current_file:
-            if config.MAX_FILE_LINES > 0 and i >= config.MAX_FILE_LINES:
-               break
-            self.add_new_line(line.removesuffix("\n"), update_panel=False)
-            i += 1
-        self.lines_panel.FitInside()
+        self.engine.load_file_from_path(path)
+        self.line_states.clear()
+        self.lines_list.SetItemCount(len(self.engine.lines))
+        self.lines_list.Refresh()
         self.update_line_states()
-        self.file_dirty = False
-    
-    def save_current_file(self):
-        if self.current_file is None:
-            raise IOError("There is no file currently opened")
-        self.current_file.truncate(0)
-        if self.current_file.seekable():
-            self.current_file.seek(0)
-        for text_line in self.text_lines:
-            self.current_file.write(text_line.get_text())
-            self.current_file.write("\n")
-        self.current_file.flush()
-        self.file_dirty = False
+        if self.engine.recovered_edits:
+            wx.MessageBox(f"{self.engine.recovered_edits} unsaved edits of this script were recovered.",
+                          caption="Edits recovered", parent=self, style=wx.OK | wx.CENTRE | wx.ICON_INFORMATION)
 
     def new_file(self, _=None):
-        if self.text_lines and self.file_dirty:
+        if self.engine.lines and self.engine.file_dirty:
             choice = self.ask_save_file()
             if choice == wx.ID_CANCEL:
                 return wx.ID_CANCEL
             if choice == wx.ID_YES:
                 self.save_file()
         
-        if self.current_file:
-            self.current_file.close()
-            self.current_file = None
-
+        self.engine.close_file()
         self.clear_lines()
-        self.file_dirty = False
+        self.engine.file_dirty = False
 
     def open_file(self, _=None):
-        if self.text_lines and self.file_dirty:
+        if self.engine.lines and self.engine.file_dirty:
             choice = self.ask_save_file()
             if choice == wx.ID_CANCEL:
                 return
@@ -124,20 +173,19 @@ class TextSwitcherGUI(wx.Frame):
                 if self.save_file() == wx.ID_CANCEL:
                     return wx.ID_CANCEL
 
-        file_dialog = wx.FileDialog(self, style=wx.FD_OPEN, wildcard="Text files (*.txt)|*.txt|All files|*.*")
+        file_dialog = wx.FileDialog(self, style=wx.FD_OPEN, wildcard="Text files (*.txt)|*.txt|Subtitles (*.srt;*.vtt)|*.srt;*.vtt|All files|*.*")
         if file_dialog.ShowModal() == wx.ID_CANCEL:
             return wx.ID_CANCEL
         
         path = file_dialog.GetPath()
         self.load_file_from_path(path)
-        self.file_dirty = False
 
     def save_file(self, _=None):
-        if not self.current_file:
+        if not self.engine.current_path:
             if self.save_file_as() == wx.ID_CANCEL:
                 return wx.ID_CANCEL
         
-        self.save_current_file()
+        self.engine.save_current_file()
     
     def save_file_as(self, _=None):
         file_dialog = wx.FileDialog(self, style=wx.FD_SAVE, wildcard="*.txt")
@@ -145,146 +193,172 @@ class TextSwitcherGUI(wx.Frame):
             return wx.ID_CANCEL
         
         path = file_dialog.GetPath()
-        self.current_file = open(path, "w+", encoding="utf8")
-        self.save_current_file()
+        self.engine.open_new_file(path)
+        self.engine.save_current_file()
 
     def show_exception(self, exception):
         wx.MessageBox(str(exception), caption=type(exception).__name__, parent=self, style=wx.OK | wx.CENTRE | wx.ICON_WARNING)
     
-    def update_line_states(self):
-        for index, line_panel in enumerate(self.text_lines):
-            if index == self.active_index:
-                line_panel.set_state("active")
-            elif index == self.active_index + 1:
-                line_panel.set_state("preview")
-            else:
-                line_panel.set_state(None)
-    
-    def add_new_line(self, text="", before_line=None, update_panel=True):
-        line_panel = TextLine(self.lines_panel, self, text)
-        index = self.text_lines.index(before_line) if before_line else len(self.text_lines)
-        self.text_lines.insert(index, line_panel)
-        self.scroll_sizer.Insert(index, line_panel, 0, wx.EXPAND | wx.ALL, 4)
-        if update_panel:
-            self.lines_panel.FitInside()
-            self.update_line_states()
-        self.file_dirty = True
-
-    def remove_line(self, line: "TextLine"):
-        line.Destroy()
-        self.text_lines.remove(line)
-        self.lines_panel.FitInside()
-        if self.active_index >= len(self.text_lines):
-            self.active_index = len(self.text_lines) - 1
+    def add_new_line(self, text="", before_index=None):
+        index = self.engine.insert_line(text, before_index)
+        self.line_states.shift(index, 1)
+        self.lines_list.SetItemCount(len(self.engine.lines))
+        self.lines_list.refresh_visible_from(index)
+        self.update_line_states()
+        self.lines_list.edit_line(index)
+
+    def remove_line(self, index):
+        if not self.engine.remove_line(index):
+            return
+        self.line_states.shift(index, -1)
+        self.lines_list.SetItemCount(len(self.engine.lines))
+        self.lines_list.refresh_visible_from(index)
         self.update_line_states()
-        self.file_dirty = True
+
+    def set_line_text(self, index, text):
+        self.engine.set_line_text(index, text)
     
     def clear_lines(self):
-        for text_line in self.text_lines:
-            text_line.Destroy()
-        self.text_lines.clear()
-        self.lines_panel.FitInside()
-        self.active_index = -1
+        self.engine.clear_lines()
+        self.lines_list.SetItemCount(0)
+        self.line_states.clear()
     
     def update_line_states(self):
-        for index, text_line in enumerate(self.text_lines):
-            text_line.update_state(index, self.active_index)
+        for index in self.line_states.update(self.engine.active_index, len(self.engine.lines)):
+            self.lines_list.RefreshItem(index)
 
-    def switch_to_line_index(self, line_index):
-        if line_index < 0 or line_index >= len(self.text_lines):
+    def lines_added(self, channel):
+        # A timed script is parsed while it plays
+        if channel is not self.channel:
             return
-        new_line = self.text_lines[line_index]
-        self.scroll_to_line(new_line)
-        try:
-            if self.obs_text_switcher.switch_text(new_line.get_text()):
-                self.active_index = line_index
-                self.update_line_states()
-        except Exception as e:
-            self.show_exception(e)
-    
-    def switch_to_text_line(self, text_line):
-        try:
-            index = self.text_lines.index(text_line)
-            self.switch_to_line_index(index)
-        except ValueError:
-            pass
+        self.lines_list.SetItemCount(len(self.engine.lines))
+        self.update_line_states()
+
+    def active_line_changed(self, channel):
+        if channel is not self.channel:
+            return
+        if self.engine.active_index >= 0:
+            self.scroll_to_line(self.engine.active_index)
+        self.update_line_states()
+
+    # Cues are only queued here, a slow OBS response must not freeze the window
+
+    def switch_to_line_index(self, line_index):
+        self.engine.switch_to_line_index(line_index)
 
     def next_line(self):
-        self.switch_to_line_index(self.active_index + 1)
+        self.engine.next_line()
 
     def prev_line(self):
-        self.switch_to_line_index(self.active_index - 1)
+        self.engine.prev_line()
     
     def hide_text(self):
-        self.obs_text_switcher.switch_text("")
-    
-    def scroll_to_line(self, text_line):
-        if text_line.Position.y < 10:
-            self.lines_panel.ScrollPages(-1)
-        elif text_line.Position.y > self.lines_panel.Size.Height - text_line.Size.Height - 20:
-            self.lines_panel.ScrollPages(1)
+        self.engine.hide_text()
     
-        self.lines_panel.ScrollChildIntoView(text_line)
+    def scroll_to_line(self, index):
+        self.lines_list.EnsureVisible(index)
 
-class TextLine(wx.Panel):
-    def __init__(self, parent, gui: TextSwitcherGUI, text):
-        super().__init__(parent)
+    def find_line(self, next_result=False):
+        if next_result and self.find_results:
+            self.find_position = (self.find_position + 1) % len(self.find_results)
+        else:
+            self.find_results = [index for index, _ in self.engine.find_lines(self.find_box.GetValue())]
+            self.find_position = 0
+        if self.find_results:
+            self.lines_list.select_line(self.find_results[self.find_position])
+
+class ScriptListCtrl(wx.ListCtrl):
+    """
+    Virtual list of the script lines: rows are only drawn when visible and their text
+    is read from the engine's lines, so the script length doesn't matter.
+    Enter or double click cues a line, F2 edits it in place.
+    """
+    def __init__(self, parent, gui: TextSwitcherGUI):
+        super().__init__(parent, style=wx.LC_REPORT | wx.LC_VIRTUAL | wx.LC_EDIT_LABELS | wx.LC_NO_HEADER | wx.LC_SINGLE_SEL)
         self.text_switcher_gui = gui
-        self.add_button = wx.Button(self, label="+", size=SQUARE_BUTTON_SIZE)
-        self.add_button.Bind(wx.EVT_BUTTON, lambda _: gui.add_new_line(before_line=self))
-        self.remove_button = wx.Button(self, label="-", size=SQUARE_BUTTON_SIZE)
-        self.remove_button.Bind(wx.EVT_BUTTON, lambda _: gui.remove_line(self))
-        self.entry = wx.TextCtrl(self)
         if sys.platform == "win32":
-            self.entry.SetFont(wx.Font(11, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL, False, "Segoe UI"))
-        self.entry.SetValue(text)
-        self.entry.Bind(wx.EVT_KEY_DOWN, self.key_down_event)
-        self.go_button = wx.Button(self, label="Go", size=wx.Size(40, SQUARE_BUTTON_SIZE.height))
-        self.go_button.Bind(wx.EVT_BUTTON, lambda _: gui.switch_to_text_line(self))
-
-        self.sizer = wx.BoxSizer(wx.HORIZONTAL)
-        self.sizer.Add(self.add_button)
-        self.sizer.Add(self.remove_button)
-        self.sizer.Add(self.entry, 1, wx.EXPAND)
-        self.sizer.Add(self.go_button)
-        self.SetSizer(self.sizer)
-    
-    def get_text(self):
-        return self.entry.GetValue()
-    
-    def update_state(self, index, active_index):
-        if index == active_index:
-            self.entry.SetBackgroundColour(wx.Colour(255, 200, 200))
-        elif index == active_index + 1:
-            self.entry.SetBackgroundColour(wx.Colour(200, 255, 200))
-        else:
-            self.entry.SetBackgroundColour(None)
-        self.entry.Refresh()
-    
-    def focus_line(self):
-        self.entry.SetFocus()
-        self.text_switcher_gui.scroll_to_line(self)
+            self.SetFont(wx.Font(11, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL, False, "Segoe UI"))
+        self.InsertColumn(0, "Text")
+
+        self.active_attr = wx.ItemAttr()
+        self.active_attr.SetBackgroundColour(wx.Colour(255, 200, 200))
+        self.preview_attr = wx.ItemAttr()
+        self.preview_attr.SetBackgroundColour(wx.Colour(200, 255, 200))
+
+        self.Bind(wx.EVT_SIZE, self.on_size)
+        self.Bind(wx.EVT_LIST_ITEM_ACTIVATED, lambda event: gui.switch_to_line_index(event.GetIndex()))
+        self.Bind(wx.EVT_LIST_END_LABEL_EDIT, self.on_end_label_edit)
+        self.Bind(wx.EVT_KEY_DOWN, self.key_down_event)
+
+    def OnGetItemText(self, item, column):
+        return self.text_switcher_gui.engine.lines[item]
+
+    def OnGetItemAttr(self, item):
+        active_index = self.text_switcher_gui.engine.active_index
+        if item == active_index:
+            return self.active_attr
+        if item == active_index + 1:
+            return self.preview_attr
+        return None
+
+    def get_selected_index(self):
+        return self.GetFirstSelected()
+
+    def refresh_visible_from(self, index):
+        last_index = min(self.GetTopItem() + self.GetCountPerPage(), self.GetItemCount() - 1)
+        first_index = max(index, self.GetTopItem())
+        if first_index <= last_index:
+            self.RefreshItems(first_index, last_index)
+
+    def select_line(self, index):
+        self.Select(index)
+        self.Focus(index)
+        self.EnsureVisible(index)
+
+    def edit_line(self, index):
+        self.select_line(index)
+        self.EditLabel(index)
+
+    def on_size(self, event: wx.SizeEvent):
+        self.SetColumnWidth(0, self.GetClientSize().width)
+        event.Skip()
+
+    def on_end_label_edit(self, event: wx.ListEvent):
+        if not event.IsEditCancelled():
+            self.text_switcher_gui.set_line_text(event.GetIndex(), event.GetLabel())
+        # A virtual list has no item storage to write the label into, the text is read from the lines again
+        event.Veto()
+        self.RefreshItem(event.GetIndex())
 
     def key_down_event(self, event: wx.KeyEvent):
-        text_lines = self.text_switcher_gui.text_lines
-        index = text_lines.index(self)
-        if event.KeyCode == wx.WXK_DOWN:
-            index += 1
-        elif event.KeyCode == wx.WXK_UP:
-            index -= 1
+        index = self.get_selected_index()
+        if event.KeyCode == wx.WXK_F2 and index != -1:
+            self.EditLabel(index)
+        elif event.KeyCode == wx.WXK_INSERT:
+            self.text_switcher_gui.add_new_line(before_index=index)
+        elif event.KeyCode == wx.WXK_DELETE and index != -1:
+            self.text_switcher_gui.remove_line(index)
         else:
-            self.text_switcher_gui.file_dirty = True
             event.Skip()
-            return
-        
-        if index >= 0 and index < len(text_lines):
-            text_lines[index].focus_line()
 
 class ControlPanel(wx.Panel):
     def __init__(self, parent: TextSwitcherGUI):
         super().__init__(parent)
         self.text_switcher_gui = parent
         self.obs_text_switcher = parent.obs_text_switcher
+        self.scene_discovery = parent.scene_discovery
+        self.scene_discovery.listeners.append(lambda: wx.CallAfter(self.update_choices))
+        self.settings_store = parent.settings_store
+        for channel in parent.channels:
+            channel.settings_store.listeners.append(lambda channel=channel: wx.CallAfter(self.settings_loaded, channel))
+
+        self.channel_selector = wx.Choice(self, choices=[channel.name for channel in parent.channels])
+        self.channel_selector.SetStringSelection(parent.channel.name)
+        self.channel_selector.Bind(wx.EVT_CHOICE,
+                                   lambda _: parent.select_channel(parent.channels[self.channel_selector.GetStringSelection()]))
+        self.channel_selector.Show(len(parent.channels) > 1)
+        self.selector_divider0 = wx.StaticLine(self)
+        self.selector_divider0.Show(len(parent.channels) > 1)
 
         self.scene1_selector = wx.Choice(self)
         self.scene2_selector = wx.Choice(self)
@@ -305,6 +379,9 @@ class ControlPanel(wx.Panel):
 
         sizer_args = (0, wx.EXPAND | wx.ALL, 4)
 
+        self.sizer.Add(self.channel_selector, *sizer_args)
+        self.sizer.Add(self.selector_divider0, *sizer_args)
+
         for selector in [self.scene1_selector, self.scene2_selector]:
             selector.Bind(wx.EVT_CHOICE, self.update_choices)
             self.sizer.Add(selector, *sizer_args)
@@ -352,13 +429,20 @@ class ControlPanel(wx.Panel):
 
     def update_choices(self, _=None):
         try:
-            scenes = self.obs_text_switcher.get_scene_names()
+            # Only cached values are used here, missing ones are fetched in the background and
+            # the discovery listener calls this again once they are there
+            scenes = self.scene_discovery.get_scene_names()
+            if scenes is None:
+                self.buttons_panel.Disable()
+                return
 
             scene1 = self.update_selector_items(self.scene1_selector, scenes, "Scene 1", default_item=self.obs_text_switcher.scene1)
             scene2 = self.update_selector_items(self.scene2_selector, scenes, "Scene 2", default_item=self.obs_text_switcher.scene2)
             
-            scene1_sources = [] if scene1 is None else self.obs_text_switcher.get_text_sources(scene1)
-            scene2_sources = [] if scene2 is None else self.obs_text_switcher.get_text_sources(scene2)
+            scene1_sources = [] if scene1 is None else self.scene_discovery.get_text_sources(scene1)
+            scene2_sources = [] if scene2 is None else self.scene_discovery.get_text_sources(scene2)
+            if scene1_sources is None or scene2_sources is None:
+                return
 
             source1 = self.update_selector_items(self.source1_selector, scene1_sources, "Source 1",
                                                  default_item=self.obs_text_switcher.source1,
@@ -371,7 +455,7 @@ class ControlPanel(wx.Panel):
             self.obs_text_switcher.scene2 = scene2
             self.obs_text_switcher.source1 = source1
             self.obs_text_switcher.source2 = source2
-            self.obs_text_switcher.save_settings()
+            self.settings_store.save()
 
             for choice in [scene1, scene2, source1, source2]:
                 if choice is None:
@@ -381,6 +465,22 @@ class ControlPanel(wx.Panel):
         except Exception as e:
             self.text_switcher_gui.show_exception(e)
 
+    def select_channel(self, channel):
+        self.obs_text_switcher = channel.obs_text_switcher
+        self.settings_store = channel.settings_store
+        self.channel_selector.SetStringSelection(channel.name)
+        self.reset_selection()
+
+    def settings_loaded(self, channel):
+        # OBS had other settings than the local cache, select them instead of keeping the current selection
+        if channel.settings_store is self.settings_store:
+            self.reset_selection()
+
+    def reset_selection(self):
+        for selector in [self.scene1_selector, self.scene2_selector, self.source1_selector, self.source2_selector]:
+            selector.SetSelection(wx.NOT_FOUND)
+        self.update_choices()
+
 if __name__ == "__main__":
     if hasattr(ctypes, "windll"):
         ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID("obsosctextswitcher.1.0")
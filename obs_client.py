@@ -0,0 +1,314 @@
+import json
+import logging
+import socket
+import threading
+import time
+import websocket
+import obswebsocket
+from obswebsocket import exceptions
+from obswebsocket.core import RecvThread
+from latency import stats
+from config import OBS_CONNECT_TIMEOUT, OBS_RECONNECT_MIN_DELAY, OBS_RECONNECT_MAX_DELAY, OBS_MAX_IN_FLIGHT
+
+LOG = logging.getLogger(__name__)
+
+REQUEST_BATCH_EXECUTION_SERIAL_REALTIME = 0
+
+# Pre-encoded messages end with the request id, so a call only appends the id and this
+ENCODED_MESSAGE_END = '"}}'
+
+
+def encode_request(request):
+    """
+    Encodes the request for call_encoded. Returns the message up to the request id and the name it is measured under.
+    """
+    encoded = (f'{{"op": 6, "d": {{"requestType": {json.dumps(request.name)}, '
+               f'"requestData": {json.dumps(request.data())}, "requestId": "')
+    return encoded, f"obs.{request.name}"
+
+
+def encode_batch(requests):
+    """
+    Encodes the requests for call_encoded_batch (halting on the first failure).
+    Returns the message up to the request id and the name the batch is measured under.
+    """
+    encoded_requests = json.dumps([{"requestType": request.name, "requestData": request.data()}
+                                   for request in requests])
+    encoded = (f'{{"op": 8, "d": {{"haltOnFailure": true, "executionType": {REQUEST_BATCH_EXECUTION_SERIAL_REALTIME}, '
+               f'"requests": {encoded_requests}, "requestId": "')
+    return encoded, f"obs.batch.{'+'.join(request.name for request in requests)}"
+
+
+class OBSClient(obswebsocket.obsws):
+    """
+    obsws with support for obs-websocket v5 request batches (op 8/9), so several requests
+    can be executed in order with a single round-trip. Requests can be made from several threads at once,
+    they are pipelined on the connection up to max_in_flight requests without an answer.
+    connect_in_background() connects on a ConnectThread, which also reconnects with exponential backoff
+    whenever the connection is lost.
+    """
+
+    def __init__(self, *args, max_in_flight=OBS_MAX_IN_FLIGHT, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Makes the receive thread call reconnect() when the connection is lost
+        self.authreconnect = True
+        # Several cue workers can share one connection, so request ids must be handed out atomically
+        self.id_lock = threading.Lock()
+        self.max_in_flight = max_in_flight
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+        self.connected = False
+        self.connect_thread = None
+        self.connect_listeners = []  # called with the client after every (re)connect, after on_connect
+        self.disconnect_listeners = []  # called with the client when the connection was lost
+
+    def is_connected(self):
+        return self.connected
+
+    def connect_in_background(self):
+        if self.connect_thread is None:
+            self.connect_thread = ConnectThread(self)
+            self.connect_thread.start()
+
+    def connect(self):
+        # Same as obsws.connect for the v5 protocol, but with a receive thread that understands batch responses.
+        # Failures are raised, retrying is up to the ConnectThread.
+        try:
+            self.ws = websocket.WebSocket()
+            url = f"ws://{self.host}:{self.port}"
+            LOG.info("Connecting to %s...", url)
+            self.ws.connect(url, timeout=OBS_CONNECT_TIMEOUT)
+            self._auth()
+            self.ws.settimeout(None)
+            LOG.info("Connected!")
+        except (socket.error, websocket.WebSocketException) as e:
+            raise exceptions.ConnectionFailure(str(e))
+
+        if self.thread_recv is not None:
+            self.thread_recv.running = False
+        self.thread_recv = BatchRecvThread(self)
+        self.thread_recv.daemon = True
+        self.thread_recv.start()
+        self.connected = True
+        for listener in ([self.on_connect] if self.on_connect else []) + self.connect_listeners:
+            try:
+                listener(self)
+            except Exception:
+                LOG.exception("Connect listener failed")
+
+    def reconnect(self):
+        # Called by the receive thread when the connection was lost, so it must not block
+        if not self.connected:
+            return
+        LOG.warning("Connection to OBS lost")
+        self.connected = False
+        self.thread_recv.running = False
+        try:
+            self.ws.close()
+        except (socket.error, websocket.WebSocketException):
+            pass
+        # Requests waiting for an answer fail right away instead of after the timeout
+        for event in list(self.events.values()):
+            event.set()
+        for listener in self.disconnect_listeners:
+            try:
+                listener(self)
+            except Exception:
+                LOG.exception("Disconnect listener failed")
+        if self.connect_thread is not None:
+            self.connect_thread.wakeup.set()
+
+    def disconnect(self):
+        if self.connect_thread is not None:
+            self.connect_thread.stop()
+            self.connect_thread = None
+        self.connected = False
+        if self.ws is not None:
+            super().disconnect()
+
+    def _new_request_id(self):
+        if not self.connected:
+            raise exceptions.ConnectionFailure("Not connected to OBS")
+        if not self.in_flight.acquire(timeout=self.timeout):
+            raise exceptions.MessageTimeout(f"More than {self.max_in_flight} requests without an answer")
+        with self.id_lock:
+            message_id = str(self.id)
+            self.id += 1
+        event = threading.Event()
+        self.events[message_id] = event
+        return message_id, event
+
+    def _send_and_wait(self, message_id, event, message):
+        # The request id and its slot are given back even if sending fails
+        try:
+            self.ws.send(message)
+            event.wait(self.timeout)
+        finally:
+            self.events.pop(message_id)
+            self.in_flight.release()
+        if message_id not in self.answers:
+            raise exceptions.MessageTimeout(f"No answer for message {message_id}")
+        return self.answers.pop(message_id)
+
+    def call(self, obj):
+        if not stats.enabled:
+            return self._call(obj)
+        start_time = time.monotonic()
+        try:
+            return self._call(obj)
+        finally:
+            stats.record_since(f"obs.{obj.name}", start_time)
+
+    def _call(self, obj):
+        # Same as obsws.call for the v5 protocol, but safe to use from several threads at once
+        if not isinstance(obj, obswebsocket.base_classes.Baserequests):
+            raise exceptions.ObjectError("Call parameter is not a request object")
+        message_id, event = self._new_request_id()
+        payload = {
+            "op": 6,
+            "d": {
+                "requestId": message_id,
+                "requestType": obj.name,
+                "requestData": obj.data()
+            }
+        }
+        LOG.debug("Sending message id %s: %s", message_id, payload)
+        answer = self._send_and_wait(message_id, event, json.dumps(payload))
+        obj.input(answer.get("responseData", {}), answer["requestStatus"]["result"])
+        return obj
+
+    def call_batch(self, requests, halt_on_failure=True):
+        """
+        Executes the requests in order on the OBS server and fills them with their responses.
+        With halt_on_failure, the requests after the first failed one are not executed and keep a status of None.
+        """
+        if not stats.enabled:
+            return self._call_batch(requests, halt_on_failure)
+        start_time = time.monotonic()
+        try:
+            return self._call_batch(requests, halt_on_failure)
+        finally:
+            stats.record_since(f"obs.batch.{'+'.join(request.name for request in requests)}", start_time)
+
+    def _call_batch(self, requests, halt_on_failure):
+        for request in requests:
+            if not isinstance(request, obswebsocket.base_classes.Baserequests):
+                raise exceptions.ObjectError("Batch item is not a request object")
+
+        message_id, event = self._new_request_id()
+        payload = {
+            "op": 8,
+            "d": {
+                "requestId": message_id,
+                "haltOnFailure": halt_on_failure,
+                "executionType": REQUEST_BATCH_EXECUTION_SERIAL_REALTIME,
+                "requests": [{"requestType": request.name, "requestData": request.data()} for request in requests]
+            }
+        }
+        LOG.debug("Sending batch id %s: %s", message_id, payload)
+        results = self._send_and_wait(message_id, event, json.dumps(payload)).get("results", [])
+        for request in requests:
+            request.comment = None
+        for request, result in zip(requests, results):
+            status = result["requestStatus"]
+            request.input(result.get("responseData", {}), status["result"])
+            request.comment = status.get("comment")
+        return requests
+
+
+    def call_encoded(self, encoded_request):
+        """
+        Executes a request encoded ahead with encode_request and returns its requestStatus.
+        """
+        encoded, name = encoded_request
+        start_time = time.monotonic() if stats.enabled else None
+        message_id, event = self._new_request_id()
+        status = self._send_and_wait(message_id, event, encoded + message_id + ENCODED_MESSAGE_END)["requestStatus"]
+        stats.record_since(name, start_time)
+        return status
+
+    def call_encoded_batch(self, encoded_batch):
+        """
+        Executes a batch encoded ahead with encode_batch (halting on the first failure)
+        and returns the requestStatus of each executed request.
+        """
+        encoded, name = encoded_batch
+        start_time = time.monotonic() if stats.enabled else None
+        message_id, event = self._new_request_id()
+        results = self._send_and_wait(message_id, event, encoded + message_id + ENCODED_MESSAGE_END).get("results", [])
+        stats.record_since(name, start_time)
+        return [result["requestStatus"] for result in results]
+
+
+class ConnectThread(threading.Thread):
+    """
+    Connects the client and connects it again whenever the connection was lost. The delay between failed
+    attempts doubles from OBS_RECONNECT_MIN_DELAY up to OBS_RECONNECT_MAX_DELAY.
+    """
+
+    def __init__(self, core):
+        super().__init__(name="OBSConnect", daemon=True)
+        self.core = core
+        self.wakeup = threading.Event()
+        self.running = True
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+
+    def run(self):
+        delay = OBS_RECONNECT_MIN_DELAY
+        while self.running:
+            if not self.core.is_connected():
+                try:
+                    self.core.connect()
+                    delay = OBS_RECONNECT_MIN_DELAY
+                except exceptions.ConnectionFailure as e:
+                    LOG.warning("Could not connect to OBS (%s), retrying in %.1f s", e, delay)
+                    self.wakeup.wait(delay)
+                    self.wakeup.clear()
+                    delay = min(delay * 2, OBS_RECONNECT_MAX_DELAY)
+                    continue
+            self.wakeup.wait()
+            self.wakeup.clear()
+
+
+class BatchRecvThread(RecvThread):
+    def __init__(self, core):
+        super().__init__(core)
+        self.ws = BatchResponseFilter(core, self.ws)
+
+
+class BatchResponseFilter:
+    """
+    Wraps the websocket read by a RecvThread, handles RequestBatchResponse messages itself
+    and passes everything else through unchanged.
+    """
+
+    def __init__(self, core, ws):
+        self.core = core
+        self.ws = ws
+
+    def recv(self):
+        try:
+            message = self.ws.recv()
+        except OSError as e:
+            # e.g. a connection reset, RecvThread would die on it instead of reconnecting
+            raise websocket.WebSocketConnectionClosedException(str(e))
+        # Cheap check first, so events and normal responses aren't parsed twice
+        if not message or '"results"' not in message:
+            return message
+
+        result = json.loads(message)
+        if result.get("op") != 9:  # RequestBatchResponse
+            return message
+
+        request_id = result["d"]["requestId"]
+        LOG.debug("Got batch answer for id %s: %s", request_id, result)
+        if request_id in self.core.events:
+            self.core.answers[request_id] = result["d"]
+            self.core.events[request_id].set()
+        # RecvThread skips empty messages
+        return ""
+
+    def __getattr__(self, item):
+        return getattr(self.ws, item)
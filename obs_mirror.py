@@ -0,0 +1,94 @@
+import time
+import threading
+import logging
+from cue_scheduler import BUSY_POLL_INTERVAL
+from latency import stats
+
+LOG = logging.getLogger(__name__)
+
+
+class OBSMirror(threading.Thread):
+    """
+    Applies the cues of a channel to another OBS instance (e.g. a hot standby) on its own thread, so a slow or
+    unreachable instance never delays the others. Its OBSTextSwitcher keeps the transition state and latency
+    of that instance. While it is busy or disconnected only the latest cue is kept, it catches up with that one.
+    """
+
+    def __init__(self, name, obs_text_switcher):
+        super().__init__(name=f"OBSMirror-{name}", daemon=True)
+        self.name = name
+        self.obs_text_switcher = obs_text_switcher
+        self.condition = threading.Condition()
+        self.pending = None  # (text, settings, time it was cued) of the latest cue that wasn't applied yet
+        self.running = True
+        self.cues = 0
+        self.coalesced = 0
+        self.failures = 0
+        obs_text_switcher.connected_listeners.append(self.notify)
+        obs_text_switcher.transition_ended_listeners.append(self.notify)
+        self.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
+    def notify(self):
+        with self.condition:
+            self.condition.notify()
+
+    def is_connected(self):
+        return self.obs_text_switcher.is_connected()
+
+    def cue(self, text, settings):
+        with self.condition:
+            if self.pending is not None:
+                self.coalesced += 1
+            self.pending = text, settings, time.monotonic()
+            self.condition.notify()
+
+    def arm(self, text, settings):
+        # Staging runs on the switcher's own executor
+        self.obs_text_switcher.apply_settings(settings)
+        self.obs_text_switcher.arm_text(text)
+
+    def set_upcoming_text(self, text, settings):
+        self.obs_text_switcher.apply_settings(settings)
+        self.obs_text_switcher.set_upcoming_text(text)
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and (self.pending is None or self.obs_text_switcher.is_busy()):
+                    self.condition.wait(BUSY_POLL_INTERVAL if self.pending else None)
+                if not self.running:
+                    return
+                pending = self.pending
+                self.pending = None
+
+            text, settings, cue_time = pending
+            try:
+                self.obs_text_switcher.apply_settings(settings)
+                fired = self.obs_text_switcher.switch_text(text)
+            except Exception as e:
+                fired = False
+                if self.obs_text_switcher.is_connected():
+                    self.failures += 1
+                    LOG.warning("Cue failed on %s: %s", self.name, e)
+                    continue
+            if fired:
+                self.cues += 1
+                stats.record(f"mirror.{self.name}.lag", time.monotonic() - cue_time)
+            elif self.obs_text_switcher.is_busy():
+                with self.condition:
+                    # Retried when the instance is ready again, unless a newer cue replaced it
+                    if self.pending is None:
+                        self.pending = pending
+
+    def get_stats(self):
+        obs_text_switcher = self.obs_text_switcher
+        with self.condition:
+            return dict(connected=obs_text_switcher.is_connected(),
+                        transition_active=obs_text_switcher.is_transition_active(),
+                        latency_ms=obs_text_switcher.cue_latency.value * 1000, cues=self.cues,
+                        coalesced=self.coalesced, failures=self.failures, pending=self.pending is not None)
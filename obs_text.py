@@ -1,29 +1,141 @@
 import time
-import obswebsocket
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from obswebsocket import requests as obsrequests
 from obswebsocket import events as obsevents
-from config import OBS_WS_HOST, OBS_WS_PASSWORD, OBS_WS_PORT, OBS_TRANSITION_TIMEOUT
+from obs_client import OBSClient, encode_batch, encode_request
+from latency import LatencyEstimate
+from config import OBS_WS_HOST, OBS_WS_PASSWORD, OBS_WS_PORT, OBS_TRANSITION_TIMEOUT, OBS_TRANSITION_MARGIN, \
+    OBS_PRESTAGE_TEXT
+
+LOG = logging.getLogger(__name__)
+
+
+SETTINGS_SLOT = "osc_text_switcher_settings"
+CUT_TRANSITION_KIND = "cut_transition"
+
+
+class CueError(Exception):
+    pass
+
 
 class OBSTextSwitcher:
-    def __init__(self):
-        self.client = obswebsocket.obsws(OBS_WS_HOST, OBS_WS_PORT, OBS_WS_PASSWORD, authreconnect=3)
-        self.client.connect()
-        self.client.register(self._input_name_changed, obsevents.InputNameChanged)
-        self.client.register(self._scene_name_changed, obsevents.SceneNameChanged)
-        self.client.register(self._transition_started, obsevents.SceneTransitionStarted)
-        self.client.register(self._transition_ended, obsevents.SceneTransitionEnded)
+    """
+    Switches the text of one scene/source pair. Several switchers (channels) can share the client of another one,
+    each keeps its own transition state and only holds back cues for transitions involving its own scenes.
+    The connection is made in the background, the switcher is busy until it is there.
+    Cues are also passed on to the OBSMirrors of other OBS instances, which apply them concurrently on their own
+    threads. If this instance is unreachable, the cues still go to the mirrors.
+    """
+
+    def __init__(self, host=OBS_WS_HOST, port=OBS_WS_PORT, password=OBS_WS_PASSWORD, client=None,
+                 settings_slot=SETTINGS_SLOT):
+        self.settings_slot = settings_slot
         self.transition_start_time = None
+        self.transition_duration = None  # seconds of OBS's current transition, None if unknown
+        self.transitions_ended = 0
+        self.transition_ended_listeners = []
+        self.connected_listeners = []  # called after every (re)connect, once the state is resynced
+        self.disconnected_listeners = []  # called when the connection was lost
+        self.program_scene = None
         self.scene1 = None
         self.scene2 = None
         self.source1 = None
         self.source2 = None
 
+        # Pre-staging: the upcoming line is written into the off-air source after each transition,
+        # so the next cue only has to switch the scene
+        self.prestage_text = OBS_PRESTAGE_TEXT
+        self.upcoming_text = None
+        self.upcoming_armed = False  # upcoming_text is an armed cue's text that wasn't staged yet
+        self.source_texts = {}  # text we last wrote into each source
+        self.cue_lock = threading.Lock()
+        self.cue_latency = LatencyEstimate()  # round-trip of this instance's cue requests
+        self.mirrors = []
+        self.retried_cue = None  # sequence number of a cue the mirrors got although it failed here, see switch_text
+        self.encoded_scene_switches = {}  # scene name -> encoded SetCurrentProgramScene request
+        self.staging_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="staging")
+
+        self.owns_client = client is None
+        self.client = OBSClient(host, port, password) if client is None else client
+        self.client.connect_listeners.append(self._connected)
+        self.client.disconnect_listeners.append(self._disconnected)
+        self.client.register(self._input_name_changed, obsevents.InputNameChanged)
+        self.client.register(self._input_settings_changed, obsevents.InputSettingsChanged)
+        self.client.register(self._scene_name_changed, obsevents.SceneNameChanged)
+        self.client.register(self._program_scene_changed, obsevents.CurrentProgramSceneChanged)
+        self.client.register(self._transition_started, obsevents.SceneTransitionStarted)
+        self.client.register(self._transition_ended, obsevents.SceneTransitionEnded)
+        self.client.register(self._transition_changed, obsevents.CurrentSceneTransitionChanged)
+        self.client.register(self._transition_duration_changed, obsevents.CurrentSceneTransitionDurationChanged)
+        if self.owns_client:
+            self.client.connect_in_background()
+        elif self.client.is_connected():
+            self._connected(self.client)
+
     def disconnect(self):
-        self.client.disconnect()
+        self.staging_executor.shutdown(wait=False, cancel_futures=True)
+        for mirror in self.mirrors:
+            mirror.stop()
+            mirror.obs_text_switcher.disconnect()
+        if self.owns_client:
+            self.client.disconnect()
+
+    def add_mirror(self, mirror):
+        self.mirrors.append(mirror)
+        mirror.obs_text_switcher.apply_settings(self.get_settings())
+
+    def get_instance_stats(self):
+        """
+        Returns the connection, transition and latency state of this OBS instance and each mirror by host:port.
+        """
+        instances = {f"{self.client.host}:{self.client.port}": dict(
+            connected=self.is_connected(), transition_active=self.is_transition_active(),
+            latency_ms=self.cue_latency.value * 1000)}
+        for mirror in self.mirrors:
+            instances[mirror.name] = mirror.get_stats()
+        return instances
+
+    def _connected(self, _):
+        # Also called after an automatic reconnect, where scene changes may have been missed
+        self.program_scene = None
+        self.transition_start_time = None
+        self.source_texts.clear()
+        try:
+            self.program_scene = self.get_program_scene()
+        except Exception as e:
+            # Fetched again by the first cue, see get_cached_program_scene
+            LOG.warning("Could not get the program scene: %s", e)
+        self.fetch_transition_duration()
+        for listener in self.connected_listeners:
+            listener()
+        if self.prestage_text or self.upcoming_armed:
+            self.staging_executor.submit(self.stage_upcoming_text)
+
+    def _disconnected(self, _):
+        self.program_scene = None
+        self.transition_start_time = None
+        for listener in self.disconnected_listeners:
+            listener()
+
+    def is_connected(self):
+        return self.client.is_connected()
+
+    def is_busy(self):
+        """
+        Tells if a cue has to wait: while a transition is running or OBS is not connected.
+        The mirrors' transitions don't count, they catch up on their own.
+        """
+        if not self.client.is_connected():
+            return not any(mirror.is_connected() for mirror in self.mirrors)
+        return self.is_transition_active()
     
     def _input_name_changed(self, event):
         old_name = event.getOldInputName()
         new_name = event.getInputName()
+        if old_name in self.source_texts:
+            self.source_texts[new_name] = self.source_texts.pop(old_name)
         if old_name == self.source1:
             self.source1 = new_name
         if old_name == self.source2:
@@ -34,46 +146,115 @@ class OBSTextSwitcher:
         new_name = event.getSceneName()
         if old_name == self.scene1:
             self.scene1 = new_name
-        if old_name == self.scene1:
-            self.scene1 = new_name
+        if old_name == self.scene2:
+            self.scene2 = new_name
+        if old_name == self.program_scene:
+            self.program_scene = new_name
+
+    def _program_scene_changed(self, event):
+        self.program_scene = event.getSceneName()
 
     def _transition_started(self, _):
-        self.transition_start_time = time.time()
+        # Other channels' transitions don't concern this one. The program scene is usually already the new one here,
+        # and a cue of this channel marks its transition as running itself in case the event is earlier.
+        if self.program_scene is None or self.program_scene in (self.scene1, self.scene2):
+            self.transition_start_time = time.time()
     
+    def _transition_changed(self, _):
+        # The event only has the name, the receive thread can't wait for the duration
+        self.staging_executor.submit(self.fetch_transition_duration)
+
+    def _transition_duration_changed(self, event):
+        self.transition_duration = event.getTransitionDuration() / 1000
+
+    def fetch_transition_duration(self):
+        try:
+            transition = self.client.call(obsrequests.GetCurrentSceneTransition())
+            if not transition.status:
+                self.transition_duration = None
+            elif transition.getTransitionKind() == CUT_TRANSITION_KIND:
+                self.transition_duration = 0.0
+            else:
+                # Fixed transitions like stingers have no configurable duration
+                duration = transition.getTransitionDuration()
+                self.transition_duration = duration / 1000 if duration is not None else None
+        except Exception as e:
+            LOG.warning("Could not get the current transition: %s", e)
+            self.transition_duration = None
+
+    def _input_settings_changed(self, event):
+        # OBS also sends this for our own SetInputSettings, often only after the response (libobs updates sources
+        # deferred), so only a different text means someone else changed it and what we staged can't be trusted.
+        # Settings at their default value are left out, which for the text is "".
+        input_name = event.getInputName()
+        text = (event.getInputSettings() or {}).get("text", "")
+        if input_name in self.source_texts and self.source_texts[input_name] != text:
+            self.source_texts.pop(input_name, None)
+
     def _transition_ended(self, _):
         self.transition_start_time = None
+        self.transitions_ended += 1
+        for listener in self.transition_ended_listeners:
+            listener()
+        if self.prestage_text or self.upcoming_armed:
+            # Event handlers run on the websocket receive thread, which can't wait for responses
+            self.staging_executor.submit(self.stage_upcoming_text)
     
+    def get_transition_hold(self):
+        """
+        Returns how long a transition holds cues at most, if SceneTransitionEnded never arrives (e.g. because
+        the transition was interrupted): as long as the current transition takes, OBS_TRANSITION_TIMEOUT if unknown.
+        """
+        if self.transition_duration is None:
+            return OBS_TRANSITION_TIMEOUT
+        return min(OBS_TRANSITION_TIMEOUT, self.transition_duration + OBS_TRANSITION_MARGIN)
+
     def is_transition_active(self):
         if self.transition_start_time is None:
             return False
-        if time.time() > self.transition_start_time + OBS_TRANSITION_TIMEOUT:
+        if time.time() > self.transition_start_time + self.get_transition_hold():
             self.transition_start_time = None
             return False
         return True
     
-    def save_settings(self):
-        settings = dict(scene1=self.scene1, scene2=self.scene2,
-                        source1=self.source1, source2=self.source2)
-        self.client.call(obsrequests.SetPersistentData(realm="OBS_WEBSOCKET_DATA_REALM_GLOBAL",
-                                                        slotName=f"osc_text_switcher_settings",
-                                                        slotValue=settings))
+    def get_settings(self):
+        return dict(scene1=self.scene1, scene2=self.scene2,
+                    source1=self.source1, source2=self.source2)
 
-    def load_settings(self):
-        request = obsrequests.GetPersistentData(realm="OBS_WEBSOCKET_DATA_REALM_GLOBAL",
-                                                slotName=f"osc_text_switcher_settings")
-        settings = self.client.call(request).getSlotValue()
-        if not isinstance(settings, dict):
-            return
+    def apply_settings(self, settings):
         self.scene1 = settings.get("scene1", None)
         self.scene2 = settings.get("scene2", None)
         self.source1 = settings.get("source1", None)
         self.source2 = settings.get("source2", None)
 
+    def save_settings(self, settings=None):
+        if settings is None:
+            settings = self.get_settings()
+        return self.client.call(obsrequests.SetPersistentData(realm="OBS_WEBSOCKET_DATA_REALM_GLOBAL",
+                                                               slotName=self.settings_slot,
+                                                               slotValue=settings)).status
+
+    def fetch_settings(self):
+        """
+        Returns the settings stored in OBS or None if there are none.
+        """
+        request = obsrequests.GetPersistentData(realm="OBS_WEBSOCKET_DATA_REALM_GLOBAL",
+                                                slotName=self.settings_slot)
+        settings = self.client.call(request).getSlotValue()
+        return settings if isinstance(settings, dict) else None
+
+    def load_settings(self):
+        settings = self.fetch_settings()
+        if settings is not None:
+            self.apply_settings(settings)
+
     def is_studio_mode(self):
         return self.client.call(obsrequests.GetStudioModeEnabled()).getStudioModeEnabled()
 
     def set_input_text(self, input_name, text):
-        self.client.call(obsrequests.SetInputSettings(inputName=input_name, inputSettings={"text": text}))
+        self.source_texts.pop(input_name, None)
+        if self.client.call(obsrequests.SetInputSettings(inputName=input_name, inputSettings={"text": text})).status:
+            self.source_texts[input_name] = text
 
     def get_scene_names(self):
         scenes = self.client.call(obsrequests.GetSceneList()).getScenes()
@@ -91,20 +272,148 @@ class OBSTextSwitcher:
             # self.client.call(obsrequests.SetCurrentPreviewScene(sceneName=scene_name))
             # self.client.call(obsrequests.TriggerStudioModeTransition())
         # else:
-        self.client.call(obsrequests.SetCurrentProgramScene(sceneName=scene_name))
+        encoded_request = self.encoded_scene_switches.get(scene_name)
+        if encoded_request is None:
+            encoded_request = encode_request(obsrequests.SetCurrentProgramScene(sceneName=scene_name))
+            self.encoded_scene_switches[scene_name] = encoded_request
+        if self.client.call_encoded(encoded_request)["result"]:
+            # Don't wait for CurrentProgramSceneChanged, a cue right after this one must already see the new scene
+            self.program_scene = scene_name
 
-    def switch_text(self, new_text):
-        scene2_active = self.get_program_scene() == self.scene2
-        if self.scene1 is None or self.scene2 is None:
-            return False
-        if self.source1 is None or self.source2 is None:
+    def get_cached_program_scene(self):
+        if self.program_scene is None:
+            self.program_scene = self.get_program_scene()
+        return self.program_scene
+
+    def get_off_air_target(self):
+        """
+        Returns the scene that is not on air and its text source as a tuple.
+        """
+        if self.get_cached_program_scene() == self.scene2:
+            return self.scene1, self.source1
+        return self.scene2, self.source2
+
+    def set_upcoming_text(self, text):
+        """
+        Sets the text that is most likely cued next. It is staged into the off-air source if pre-staging is enabled.
+        """
+        for mirror in self.mirrors:
+            mirror.set_upcoming_text(text, self.get_settings())
+        if self.upcoming_armed:
+            # An armed cue is known to come, it wins over the guess
+            return
+        self.upcoming_text = text
+        if self.prestage_text:
+            self.staging_executor.submit(self.stage_upcoming_text)
+
+    def arm_text(self, text):
+        """
+        Stages text into the off-air source right away (even without pre-staging), for a cue that is known to come.
+        If a transition is running, it is staged once that ended.
+        """
+        for mirror in self.mirrors:
+            mirror.arm(text, self.get_settings())
+        self.upcoming_text = text
+        self.upcoming_armed = True
+        self.staging_executor.submit(self.stage_upcoming_text)
+
+    def stage_upcoming_text(self):
+        try:
+            with self.cue_lock:
+                text = self.upcoming_text
+                if text is None or not self.client.is_connected() or self.is_transition_active() \
+                        or not self.is_configured():
+                    return
+                _, text_source = self.get_off_air_target()
+                if self.source_texts.get(text_source) != text:
+                    self.set_input_text(text_source, text)
+                self.upcoming_armed = False
+        except Exception:
+            LOG.exception("Could not stage the upcoming text")
+
+    def is_configured(self):
+        return None not in (self.scene1, self.scene2, self.source1, self.source2)
+
+    def get_targets(self):
+        # The scene/source pairs, compiled cues are only valid for the pairs they were compiled for
+        return (self.scene1, self.source1), (self.scene2, self.source2)
+
+    def compile_text(self, text):
+        """
+        Returns the cue batch of text (see _set_text_and_switch) pre-encoded for both scene/source pairs,
+        for switch_text. Used by the CueTable.
+        """
+        targets = self.get_targets()
+        return targets, tuple(encode_batch([obsrequests.SetInputSettings(inputName=source, inputSettings={"text": text}),
+                                            obsrequests.SetCurrentProgramScene(sceneName=scene)])
+                              for scene, source in targets)
+
+    def switch_text(self, new_text, compiled=None, sequence=None):
+        """
+        Cues new_text into the off-air scene and switches to it. compiled is the result of compile_text(new_text),
+        which saves building and encoding the requests. sequence identifies the cue, so the mirrors only get
+        a cue that is retried after a lost connection once.
+        """
+        if not self.is_configured():
             return False
-        if self.is_transition_active():
+        if self.is_busy():
             return False
-        
-        self.set_input_text(self.source1 if scene2_active else self.source2, new_text)
-        self.switch_to_scene(self.scene1 if scene2_active else self.scene2)
+
+        with self.cue_lock:
+            # The mirrors fire concurrently with this instance. A cue retried because the connection was lost
+            # during it already reached them.
+            if sequence is None or self.retried_cue != sequence:
+                settings = self.get_settings()
+                for mirror in self.mirrors:
+                    mirror.cue(new_text, settings)
+            self.retried_cue = None
+            if not self.client.is_connected():
+                # Only the mirrors can show it
+                return True
+
+            transitions_ended = self.transitions_ended
+            start_time = time.monotonic()
+            try:
+                target_scene, text_source = self.get_off_air_target()
+                if self.source_texts.get(text_source) == new_text:
+                    # Already staged, the cue is just the scene switch
+                    self.switch_to_scene(target_scene)
+                    if self.program_scene != target_scene:
+                        raise CueError(f"Could not switch to scene '{target_scene}'")
+                else:
+                    encoded_batch = None
+                    if compiled is not None:
+                        targets, encoded_batches = compiled
+                        if targets == self.get_targets():
+                            encoded_batch = encoded_batches[target_scene != self.scene1]
+                    self._set_text_and_switch(text_source, new_text, target_scene, encoded_batch)
+            except Exception:
+                if self.mirrors and not self.client.is_connected():
+                    self.retried_cue = sequence
+                raise
+            self.cue_latency.add(time.monotonic() - start_time)
+            if self.transitions_ended == transitions_ended:
+                # Treat the transition as running until SceneTransitionEnded, even if SceneTransitionStarted is late,
+                # so queued cues and staging don't touch the old scene while it is still visible
+                self.transition_start_time = time.time()
         return True
 
+    def _set_text_and_switch(self, text_source, new_text, target_scene, encoded_batch=None):
+        # One ordered batch: the scene switch only happens if the text could be set
+        self.source_texts.pop(text_source, None)
+        if encoded_batch is None:
+            encoded_batch = encode_batch([
+                obsrequests.SetInputSettings(inputName=text_source, inputSettings={"text": new_text}),
+                obsrequests.SetCurrentProgramScene(sceneName=target_scene),
+            ])
+        results = self.client.call_encoded_batch(encoded_batch)
+        set_text, switch_scene = results + [{"result": None}] * (2 - len(results))
+        if not set_text["result"]:
+            raise CueError(f"Could not set the text of '{text_source}': {set_text.get('comment')}")
+        self.source_texts[text_source] = new_text
+        if not switch_scene["result"]:
+            raise CueError(f"Could not switch to scene '{target_scene}': {switch_scene.get('comment')}")
+        self.program_scene = target_scene
+
 if __name__ == "__main__":
     switcher = OBSTextSwitcher()
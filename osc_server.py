@@ -1,21 +1,105 @@
+import json
+import time
+import logging
 import threading
+from functools import partial
 import config
+from pythonosc import osc_packet
 from pythonosc.dispatcher import Dispatcher
+from pythonosc.osc_message_builder import OscMessageBuilder
 from pythonosc.osc_server import BlockingOSCUDPServer
-from main import TextSwitcherGUI
+from cue_engine import CueEngine
+from cue_timer import CueTimer
+
+LOG = logging.getLogger(__name__)
+
+
+class TimedDispatcher(Dispatcher):
+    """
+    Dispatcher that never sleeps until the timetag of a bundle: the handlers are called right away
+    and can read the time.monotonic() the message is due at from due_time (None if it is due now).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.due_time = None
+
+    def call_handlers_for_packet(self, data, client_address):
+        results = []
+        try:
+            packet = osc_packet.OscPacket(data)
+        except osc_packet.ParseError:
+            return results
+        for timed_message in packet.messages:
+            # Timetags are wall clock times, the cue timer works with the monotonic clock
+            delay = timed_message.time - time.time()
+            self.due_time = time.monotonic() + delay if delay > 0 else None
+            try:
+                for handler in self.handlers_for_address(timed_message.message.address):
+                    result = handler.invoke(client_address, timed_message.message)
+                    if result is not None:
+                        results.append(result)
+            finally:
+                self.due_time = None
+        return results
+
+
+class RelativeCue:
+    """
+    A timed next or previous cue. Its line is picked when it is armed, so the line that was staged is the one
+    that fires, even if the cursor moved in between.
+    """
+
+    def __init__(self, engine: CueEngine, offset):
+        self.engine = engine
+        self.offset = offset
+        self.line_index = None
+
+    def arm(self):
+        self.line_index = self.engine.cue_scheduler.get_target_index() + self.offset
+        self.engine.arm_line(self.line_index)
+
+    def fire(self):
+        if self.line_index is None:
+            self.arm()
+        self.engine.switch_to_line_index(self.line_index)
+
+
+def _line_index(arg):
+    # Many consoles only send floats
+    if type(arg) is int:
+        return arg
+    if isinstance(arg, float) and arg.is_integer():
+        return int(arg)
+    return None
 
 
 class OSCServer(threading.Thread):
-    def __init__(self, text_switcher_gui: TextSwitcherGUI):
+    """
+    Cues engine with /obstext/next etc. and each engine of channels (name -> CueEngine) with /obstext/<name>/next etc.
+
+        /obstext/next [line index]
+        /obstext/previous
+        /obstext/hide
+        /obstext/goto <text>  (the best match of the text, see CueEngine.find_lines)
+
+    Cues in bundles with a future timetag are fired by the cue timer, as are cues sent to the /delayed address
+    of a command with the delay in seconds as first argument, e.g. /obstext/next/delayed 2.5 [line index].
+    Timed scripts (subtitles) are played with /obstext/start and /obstext/pause (both also with /delayed)
+    and /obstext/seek <position in seconds>.
+    """
+
+    def __init__(self, engine: CueEngine, host=config.OSC_LISTEN_HOST, port=config.OSC_LISTEN_PORT, channels=None):
         super().__init__()
-        self.text_switcher_gui = text_switcher_gui
+        self.engine = engine
 
-        self.dispatcher = Dispatcher()
-        self.dispatcher.map("/obstext/next", self.next_text)
-        self.dispatcher.map("/obstext/previous", self.previous_text)
-        self.dispatcher.map("/obstext/hide", self.hide_text)
+        self.cue_timer = CueTimer()
+        self.dispatcher = TimedDispatcher()
+        self.map_engine("/obstext", engine)
+        for name, channel_engine in (channels or {}).items():
+            self.map_engine(f"/obstext/{name}", channel_engine)
 
-        self.server = BlockingOSCUDPServer((config.OSC_LISTEN_HOST, config.OSC_LISTEN_PORT), self.dispatcher)
+        self.server = BlockingOSCUDPServer((host, port), self.dispatcher)
         self.start()
 
     def run(self):
@@ -23,15 +107,82 @@ class OSCServer(threading.Thread):
     
     def shutdown(self):
         self.server.shutdown()
+        self.cue_timer.stop()
+
+    def map_engine(self, prefix, engine: CueEngine):
+        commands = dict(next=self.next_text, previous=self.previous_text, hide=self.hide_text, goto=self.goto_text,
+                        start=self.start_playback, pause=self.pause_playback)
+        for command, handler in commands.items():
+            self.dispatcher.map(f"{prefix}/{command}", partial(self.handle, handler, engine, False))
+            self.dispatcher.map(f"{prefix}/{command}/delayed", partial(self.handle, handler, engine, True))
+        self.dispatcher.map(f"{prefix}/seek", partial(self.seek_playback, engine))
+        self.dispatcher.map(f"{prefix}/stats", partial(self.send_stats, engine), needs_reply_address=True)
+
+    # The handlers only queue the cue on the engine's worker, so packet intake never waits for OBS
+    # and a transition on one channel doesn't hold back the others
+
+    def handle(self, handler, engine, delayed, address, *args):
+        due_time = self.dispatcher.due_time
+        if delayed:
+            if not args or not isinstance(args[0], (int, float)):
+                LOG.warning("%s expects the delay in seconds as first argument", address)
+                return
+            due_time = (due_time or time.monotonic()) + args[0]
+            args = args[1:]
+        handler(engine, due_time, *args)
+
+    def schedule(self, due_time, fire, arm):
+        if due_time is None:
+            fire()
+        else:
+            self.cue_timer.schedule(due_time, fire, arm)
 
-    def next_text(self, address, *args):
+    def next_text(self, engine, due_time, *args):
         if len(args) == 1:
-            self.text_switcher_gui.switch_to_line_index(args[0])
+            line_index = _line_index(args[0])
+            if line_index is None:
+                # Advancing instead would move the show on by mistake
+                LOG.warning("Ignoring a jump to %r, the line index must be a whole number", args[0])
+                return
+            self.schedule(due_time, partial(engine.switch_to_line_index, line_index),
+                          partial(engine.arm_line, line_index))
+        elif due_time is None:
+            engine.next_line()
         else:
-            self.text_switcher_gui.next_line()
+            cue = RelativeCue(engine, 1)
+            self.schedule(due_time, cue.fire, cue.arm)
 
-    def previous_text(self, address, *args):
-        self.text_switcher_gui.prev_line()
+    def previous_text(self, engine, due_time, *args):
+        if due_time is None:
+            engine.prev_line()
+        else:
+            cue = RelativeCue(engine, -1)
+            self.schedule(due_time, cue.fire, cue.arm)
+
+    def hide_text(self, engine, due_time, *args):
+        self.schedule(due_time, engine.hide_text, engine.arm_hide_text)
+
+    def goto_text(self, engine, due_time, *args):
+        query = next((arg for arg in args if isinstance(arg, str)), None)
+        line_index = None if query is None else engine.find_line(query)
+        if line_index is None:
+            LOG.info("No line matches %r", query)
+            return
+        self.schedule(due_time, partial(engine.switch_to_line_index, line_index), partial(engine.arm_line, line_index))
+
+    def start_playback(self, engine, due_time, *args):
+        self.schedule(due_time, engine.play, None)
+
+    def pause_playback(self, engine, due_time, *args):
+        self.schedule(due_time, engine.pause, None)
+
+    def seek_playback(self, engine, address, *args):
+        if len(args) == 1:
+            engine.seek(float(args[0]))
 
-    def hide_text(self, address, *args):
-        self.text_switcher_gui.hide_text()
+    def send_stats(self, engine, client_address, address, *args):
+        # Replies to the sender with the stats as a JSON string, optionally to another port given as argument
+        reply_address = (client_address[0], args[0]) if len(args) == 1 else client_address
+        builder = OscMessageBuilder(address)
+        builder.add_arg(json.dumps(dict(engine.get_stats(), timer=self.cue_timer.get_stats())))
+        self.server.socket.sendto(builder.build().dgram, reply_address)
@@ -0,0 +1,126 @@
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from obswebsocket import events as obsevents
+
+LOG = logging.getLogger(__name__)
+
+
+class SceneDiscovery:
+    """
+    Cache of the scene names and the text sources of each scene, so the selectors never wait for OBS.
+    Entries are invalidated by the matching OBS events and fetched again on a background thread;
+    until then the old values are returned. Listeners are called (on that thread) after new data arrived.
+    """
+
+    def __init__(self, obs_text_switcher):
+        self.obs_text_switcher = obs_text_switcher
+        self.lock = threading.Lock()
+        self.scene_names = None
+        self.text_sources = {}  # scene name -> list of text source names
+        self.fetching = set()  # None for the scene list, scene names for their sources
+        self.listeners = []
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="discovery")
+
+        client = obs_text_switcher.client
+        client.register(self._scenes_changed, obsevents.SceneCreated)
+        client.register(self._scene_removed, obsevents.SceneRemoved)
+        client.register(self._scene_name_changed, obsevents.SceneNameChanged)
+        client.register(self._scene_items_changed, obsevents.SceneItemCreated)
+        client.register(self._scene_items_changed, obsevents.SceneItemRemoved)
+        client.register(self._input_name_changed, obsevents.InputNameChanged)
+        obs_text_switcher.connected_listeners.append(self.refresh)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_scene_names(self):
+        """
+        Returns the cached scene names, or None if they haven't been fetched yet (a fetch is then scheduled).
+        """
+        with self.lock:
+            if self.scene_names is None:
+                self._schedule_fetch(None)
+            return self.scene_names
+
+    def get_text_sources(self, scene_name):
+        """
+        Returns the cached text sources of the scene, or None if they haven't been fetched yet (a fetch is then scheduled).
+        """
+        with self.lock:
+            text_sources = self.text_sources.get(scene_name)
+            if text_sources is None:
+                self._schedule_fetch(scene_name)
+            return text_sources
+
+    def refresh(self):
+        """
+        Fetches everything again, e.g. after a reconnect where events may have been missed.
+        """
+        with self.lock:
+            self._schedule_fetch(None)
+            for scene_name in self.text_sources:
+                self._schedule_fetch(scene_name)
+
+    def _schedule_fetch(self, scene_name):
+        # Must be called with the lock held
+        if scene_name in self.fetching:
+            return
+        self.fetching.add(scene_name)
+        self.executor.submit(self._fetch, scene_name)
+
+    def _fetch(self, scene_name):
+        with self.lock:
+            self.fetching.discard(scene_name)
+        if not self.obs_text_switcher.is_connected():
+            # Fetched again by refresh() once OBS is connected
+            return
+        try:
+            if scene_name is None:
+                scene_names = self.obs_text_switcher.get_scene_names()
+                with self.lock:
+                    self.scene_names = scene_names
+                    for removed_scene in self.text_sources.keys() - set(scene_names):
+                        del self.text_sources[removed_scene]
+            else:
+                text_sources = self.obs_text_switcher.get_text_sources(scene_name)
+                with self.lock:
+                    self.text_sources[scene_name] = text_sources
+        except Exception:
+            LOG.exception("Could not fetch %s", "the scene list" if scene_name is None else f"the sources of {scene_name}")
+            return
+        for listener in self.listeners:
+            listener()
+
+    # The event handlers run on the websocket receive thread, they only schedule fetches
+
+    def _scenes_changed(self, _):
+        with self.lock:
+            self._schedule_fetch(None)
+
+    def _scene_removed(self, event):
+        with self.lock:
+            self.text_sources.pop(event.getSceneName(), None)
+            self._schedule_fetch(None)
+
+    def _scene_name_changed(self, event):
+        with self.lock:
+            text_sources = self.text_sources.pop(event.getOldSceneName(), None)
+            if text_sources is not None:
+                self.text_sources[event.getSceneName()] = text_sources
+            self._schedule_fetch(None)
+
+    def _scene_items_changed(self, event):
+        with self.lock:
+            if event.getSceneName() in self.text_sources:
+                self._schedule_fetch(event.getSceneName())
+
+    def _input_name_changed(self, event):
+        old_name = event.getOldInputName()
+        new_name = event.getInputName()
+        with self.lock:
+            for scene_name, text_sources in self.text_sources.items():
+                if old_name in text_sources:
+                    self.text_sources[scene_name] = [new_name if name == old_name else name for name in text_sources]
+        for listener in self.listeners:
+            listener()
@@ -0,0 +1,114 @@
+import json
+import os
+import logging
+
+LOG = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = ".journal"
+
+INSERT = "insert"
+REMOVE = "remove"
+EDIT = "edit"
+
+
+class ScriptJournal:
+    """
+    Append-only log of the line edits made since a script was last saved, kept next to it as <script>.journal.
+    Every edit appends one JSON line, so autosaving costs as much as the edit and not as much as the script.
+    Each line is synced to disk before record returns, so an edit that was made survives a power loss too.
+    Saving or closing the script discards the journal. If the program died before that, the edits are replayed
+    onto the script the next time it is loaded.
+    """
+
+    def __init__(self, script_path):
+        self.script_path = script_path
+        self.path = script_path + JOURNAL_SUFFIX
+        self.file = None
+        self.resume = False  # append to a recovered journal instead of starting a new one
+        self.failed = False
+
+    def _base(self):
+        # Identifies the saved script the edits apply to
+        stat = os.stat(self.script_path)
+        return dict(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+    def recover(self, lines):
+        """
+        Applies the edits of a journal that was left behind to lines (as loaded from the script).
+        Returns the number of edits applied.
+        """
+        try:
+            with open(self.path, encoding="utf8") as file:
+                entries = file.readlines()
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            LOG.warning("Could not read the journal %s: %s", self.path, e)
+            return 0
+        try:
+            if not entries or json.loads(entries[0]) != self._base():
+                LOG.warning("Ignoring the journal %s, the script was changed after it was written", self.path)
+                return 0
+        except (OSError, ValueError):
+            return 0
+
+        applied = 0
+        for entry in entries[1:]:
+            try:
+                op, index, *text = json.loads(entry)
+                if op == INSERT:
+                    lines.insert(index, text[0])
+                elif op == REMOVE:
+                    del lines[index]
+                elif op == EDIT:
+                    lines[index] = text[0]
+                else:
+                    raise ValueError(f"Unknown operation {op}")
+            except (ValueError, TypeError, IndexError):
+                # The last entry may be cut off by the crash, it is dropped so new edits can be appended
+                LOG.warning("Stopped replaying the journal %s at a broken entry", self.path)
+                try:
+                    with open(self.path, "w", encoding="utf8") as file:
+                        file.writelines(entries[:applied + 1])
+                        file.flush()
+                        os.fsync(file.fileno())
+                except OSError as e:
+                    LOG.warning("Could not repair the journal %s: %s", self.path, e)
+                    self.failed = True
+                break
+            applied += 1
+        self.resume = True
+        return applied
+
+    def record(self, op, index, text=None):
+        if self.failed:
+            return
+        entry = [op, index] if text is None else [op, index, text]
+        try:
+            if self.file is None:
+                if self.resume:
+                    self.file = open(self.path, "a", encoding="utf8")
+                else:
+                    self.file = open(self.path, "w", encoding="utf8")
+                    self.file.write(json.dumps(self._base()) + "\n")
+            self.file.write(json.dumps(entry) + "\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        except OSError as e:
+            # A journal with a gap can't be replayed, so it's given up until the next save
+            LOG.warning("Could not write the journal %s: %s", self.path, e)
+            self.discard()
+            self.failed = True
+
+    def discard(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.resume = False
+        self.failed = False
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            LOG.warning("Could not remove the journal %s: %s", self.path, e)
@@ -0,0 +1,339 @@
+import re
+import bisect
+import threading
+from collections import Counter
+
+EXACT = "exact"
+PREFIX = "prefix"
+FUZZY = "fuzzy"
+
+FUZZY_MIN_SCORE = 0.5  # share of the query's trigrams a line must contain
+FUZZY_MAX_COUNTED = 5000  # index entries counted at most, so queries of only common words stay fast
+
+NORMALIZE_PATTERN = re.compile(r"[\W_]+")
+
+
+def normalize(text):
+    return NORMALIZE_PATTERN.sub(" ", text.casefold()).strip()
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+class LineOrder:
+    """
+    The order of the line ids, kept in blocks of about BLOCK_SIZE ids that each know the line index they start at.
+    Inserting or removing a line renumbers the ids of its block and moves the start of the blocks after it,
+    instead of renumbering every line after it.
+    """
+    BLOCK_SIZE = 256
+
+    class Block:
+        __slots__ = ("ids", "offsets", "start")
+
+        def __init__(self, ids, start):
+            self.ids = ids
+            self.offsets = {line_id: offset for offset, line_id in enumerate(ids)}  # id -> index in the block
+            self.start = start
+
+    def __init__(self):
+        self.blocks = []
+        self.block_of = {}  # id -> Block
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def index_of(self, line_id):
+        block = self.block_of[line_id]
+        return block.start + block.offsets[line_id]
+
+    def id_at(self, index):
+        block = self.blocks[self._find(index)]
+        return block.ids[index - block.start]
+
+    def _find(self, index):
+        # Position of the block containing index, the last block for the index after the last line
+        low, high = 0, len(self.blocks) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.blocks[middle].start <= index:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def _move_after(self, position, delta):
+        for block in self.blocks[position + 1:]:
+            block.start += delta
+
+    def insert(self, index, line_id):
+        if not self.blocks or (index == self.length and len(self.blocks[-1].ids) >= self.BLOCK_SIZE):
+            self.blocks.append(self.Block([], self.length))
+        position = self._find(index)
+        block = self.blocks[position]
+        offset = index - block.start
+        block.ids.insert(offset, line_id)
+        for offset in range(offset, len(block.ids)):
+            block.offsets[block.ids[offset]] = offset
+        self.block_of[line_id] = block
+        self.length += 1
+        self._move_after(position, 1)
+        if len(block.ids) > 2 * self.BLOCK_SIZE:
+            split = self.Block(block.ids[self.BLOCK_SIZE:], block.start + self.BLOCK_SIZE)
+            for moved_id in split.ids:
+                del block.offsets[moved_id]
+                self.block_of[moved_id] = split
+            del block.ids[self.BLOCK_SIZE:]
+            self.blocks.insert(position + 1, split)
+
+    def pop(self, index):
+        position = self._find(index)
+        block = self.blocks[position]
+        offset = index - block.start
+        line_id = block.ids.pop(offset)
+        del block.offsets[line_id]
+        del self.block_of[line_id]
+        for offset in range(offset, len(block.ids)):
+            block.offsets[block.ids[offset]] = offset
+        self.length -= 1
+        self._move_after(position, -1)
+        if not block.ids:
+            del self.blocks[position]
+        return line_id
+
+
+class SortedKeys:
+    """
+    Sorted set of strings kept in blocks of about BLOCK_SIZE, so adding or removing one only shifts its block.
+    """
+    BLOCK_SIZE = 512
+
+    def __init__(self, keys=()):
+        keys = sorted(keys)
+        self.blocks = [keys[start:start + self.BLOCK_SIZE] for start in range(0, len(keys), self.BLOCK_SIZE)]
+        self.maxes = [block[-1] for block in self.blocks]
+
+    def add(self, key):
+        if not self.blocks:
+            self.blocks.append([key])
+            self.maxes.append(key)
+            return
+        position = min(bisect.bisect_left(self.maxes, key), len(self.blocks) - 1)
+        block = self.blocks[position]
+        bisect.insort(block, key)
+        self.maxes[position] = block[-1]
+        if len(block) > 2 * self.BLOCK_SIZE:
+            self.blocks.insert(position + 1, block[self.BLOCK_SIZE:])
+            self.maxes.insert(position + 1, block[-1])
+            del block[self.BLOCK_SIZE:]
+            self.maxes[position] = block[-1]
+
+    def remove(self, key):
+        position = bisect.bisect_left(self.maxes, key)
+        block = self.blocks[position]
+        del block[bisect.bisect_left(block, key)]
+        if block:
+            self.maxes[position] = block[-1]
+        else:
+            del self.blocks[position]
+            del self.maxes[position]
+
+    def iter_from(self, key):
+        """
+        Yields the keys from key on, in order.
+        """
+        position = bisect.bisect_left(self.maxes, key)
+        if position == len(self.blocks):
+            return
+        block = self.blocks[position]
+        yield from block[bisect.bisect_left(block, key):]
+        for block in self.blocks[position + 1:]:
+            yield from block
+
+
+class ScriptIndex:
+    """
+    Search index over the script lines for exact, prefix and fuzzy (trigram) matches, ignoring case and punctuation.
+    Lines are stored under ids that don't change when other lines are inserted or removed, so edits only
+    touch the edited line's entries and the block of the LineOrder it is in.
+    """
+
+    def __init__(self, lines=()):
+        self.lock = threading.Condition()
+        self.building = None  # (lines, edits made since) while a background rebuild runs, see rebuild_in_background
+        self.rebuilds = 0
+        self.rebuild(lines)
+
+    def rebuild(self, lines):
+        with self.lock:
+            self.rebuilds += 1
+            self.building = None
+            self._clear()
+            for text in lines:
+                self._add(len(self.order), text, sort=False)
+            self.sorted_keys = SortedKeys(self.exact)  # the distinct normalized texts, for prefix lookups
+            self.lock.notify_all()
+
+    def _clear(self):
+        self.order = LineOrder()  # line index <-> id
+        self.keys = {}  # id -> normalized text
+        self.exact = {}  # normalized text -> ids
+        self.trigrams = {}  # trigram -> ids
+        self.line_trigrams = {}  # id -> trigrams of the normalized text
+        self.next_id = 0
+        self.sorted_keys = SortedKeys()
+
+    def rebuild_in_background(self, lines):
+        """
+        Like rebuild, but returns right away: the index is built on a thread without holding the lock
+        and swapped in once it is ready. Edits made meanwhile are applied to it then, searches wait for it.
+        """
+        with self.lock:
+            self.rebuilds += 1
+            self._clear()
+            self.building = list(lines), []
+            threading.Thread(target=self._build, args=(self.rebuilds, self.building[0]), name="ScriptIndex",
+                             daemon=True).start()
+
+    def _build(self, rebuild, lines):
+        built = ScriptIndex(lines)
+        with self.lock:
+            if rebuild != self.rebuilds:
+                # Rebuilt again in the meantime
+                return
+            for edit, *args in self.building[1]:
+                getattr(built, edit)(*args)
+            for name in ("order", "keys", "exact", "trigrams", "line_trigrams", "next_id", "sorted_keys"):
+                setattr(self, name, getattr(built, name))
+            self.building = None
+            self.lock.notify_all()
+
+    def insert(self, index, text):
+        with self.lock:
+            if self.building is not None:
+                self.building[1].append(("insert", index, text))
+                return
+            self._add(index, text)
+
+    def append(self, lines):
+        with self.lock:
+            if self.building is not None:
+                self.building[1].append(("append", list(lines)))
+                return
+            for text in lines:
+                self._add(len(self.order), text)
+
+    def remove(self, index):
+        with self.lock:
+            if self.building is not None:
+                self.building[1].append(("remove", index))
+                return
+            self._forget(self.order.pop(index))
+
+    def update(self, index, text):
+        with self.lock:
+            if self.building is not None:
+                self.building[1].append(("update", index, text))
+                return
+            line_id = self.order.id_at(index)
+            self._forget(line_id)
+            self._remember(line_id, text)
+
+    def _add(self, index, text, sort=True):
+        line_id = self.next_id
+        self.next_id += 1
+        self.order.insert(index, line_id)
+        self._remember(line_id, text, sort)
+
+    def _remember(self, line_id, text, sort=True):
+        key = normalize(text)
+        self.keys[line_id] = key
+        ids = self.exact.get(key)
+        if ids is None:
+            ids = self.exact[key] = set()
+            if sort:
+                self.sorted_keys.add(key)
+        ids.add(line_id)
+        line_trigrams = self.line_trigrams[line_id] = trigrams(key)
+        for trigram in line_trigrams:
+            self.trigrams.setdefault(trigram, set()).add(line_id)
+
+    def _forget(self, line_id):
+        key = self.keys.pop(line_id)
+        ids = self.exact[key]
+        ids.discard(line_id)
+        if not ids:
+            del self.exact[key]
+            self.sorted_keys.remove(key)
+        for trigram in self.line_trigrams.pop(line_id):
+            ids = self.trigrams[trigram]
+            ids.discard(line_id)
+            if not ids:
+                del self.trigrams[trigram]
+
+    def search(self, query, limit=10, after_index=-1):
+        """
+        Returns up to limit (line index, match kind) tuples, exact matches first, then prefix ones.
+        Fuzzy matches are only searched if there are neither, best first.
+        Within a kind and score, the lines after after_index (e.g. the active line) come first, nearest first.
+        """
+        key = normalize(query)
+        if not key:
+            return []
+        with self.lock:
+            while self.building is not None:
+                self.lock.wait()
+            results = []
+            seen = set()
+
+            def add(kind, scored_ids):
+                def order(item):
+                    score, line_id = item
+                    index = self.order.index_of(line_id)
+                    return -score, index <= after_index, index if index > after_index else -index
+
+                for _, line_id in sorted((item for item in scored_ids if item[1] not in seen), key=order):
+                    if len(results) == limit:
+                        break
+                    results.append((self.order.index_of(line_id), kind))
+                    seen.add(line_id)
+
+            add(EXACT, ((1, line_id) for line_id in self.exact.get(key, ())))
+            if len(results) < limit:
+                add(PREFIX, ((1, line_id) for line_id in self._prefix_ids(key, limit)))
+            if not results:
+                add(FUZZY, self._fuzzy_ids(key, limit))
+            return results
+
+    def _prefix_ids(self, key, limit):
+        # Counts distinct texts, so a line that is repeated many times can't fill the candidates on its own
+        ids = []
+        for count, candidate in enumerate(self.sorted_keys.iter_from(key)):
+            if not candidate.startswith(key) or count > limit * 4:
+                break
+            ids.extend(self.exact[candidate])
+        return ids
+
+    def _fuzzy_ids(self, key, limit):
+        # Returns (score, id) tuples
+        query_trigrams = trigrams(key)
+        # A line with FUZZY_MIN_SCORE of the query's trigrams lacks at most the rest of them, so it has to contain
+        # one of that many + 1 trigrams. Counting the lines in the rarest of those narrows the candidates down
+        # cheaply, only the best counted ones are compared with the query.
+        postings = sorted((self.trigrams.get(trigram, ()) for trigram in query_trigrams), key=len)
+        counts = Counter()
+        counted = 0
+        for ids in postings[:int(len(query_trigrams) * (1 - FUZZY_MIN_SCORE)) + 1]:
+            if counted and counted + len(ids) > FUZZY_MAX_COUNTED:
+                break
+            counts.update(ids)
+            counted += len(ids)
+        scored = []
+        for line_id, _ in counts.most_common(limit * 4):
+            score = len(query_trigrams & self.line_trigrams[line_id]) / len(query_trigrams)
+            if score >= FUZZY_MIN_SCORE:
+                scored.append((score, line_id))
+        return scored
@@ -0,0 +1,155 @@
+import json
+import os
+import time
+import threading
+import logging
+from config import SETTINGS_CACHE_PATH, SETTINGS_SAVE_DELAY
+
+LOG = logging.getLogger(__name__)
+
+RETRY_DELAY = 5  # seconds, after OBS didn't accept the settings
+STOP_TIMEOUT = 5  # seconds to wait for the last write when stopping
+
+
+class SettingsStore(threading.Thread):
+    """
+    Write-behind persistence of the switcher settings (scene and source selection).
+    save() only compares with what was persisted last; changes are written to OBS and the local
+    cache file on this thread once they settled for SETTINGS_SAVE_DELAY and no transition is running,
+    so they never delay a cue. At startup the cache file is applied right away and OBS is asked in the background
+    once it is connected. After a reconnect the settings are fetched again and pending changes are written right away.
+    """
+
+    def __init__(self, obs_text_switcher, cache_path=SETTINGS_CACHE_PATH, save_delay=SETTINGS_SAVE_DELAY):
+        super().__init__(name="SettingsStore", daemon=True)
+        self.obs_text_switcher = obs_text_switcher
+        self.cache_path = cache_path
+        self.save_delay = save_delay
+        self.condition = threading.Condition()
+        self.persisted = None
+        self.pending = None
+        self.due_time = None
+        self.running = True
+        self.resync = False  # fetch the settings from OBS, set whenever it (re)connected
+        self.loaded = threading.Event()
+        self.listeners = []  # called (on this thread) after settings from OBS were applied
+        obs_text_switcher.connected_listeners.append(self._connected)
+        if obs_text_switcher.is_connected():
+            self.resync = True
+
+    def load(self):
+        """
+        Applies the cached settings and starts fetching them from OBS. Wait on loaded to block until OBS answered.
+        """
+        cached = self._read_cache()
+        if cached is not None:
+            self.obs_text_switcher.apply_settings(cached)
+            self.persisted = cached
+        self.start()
+
+    def save(self):
+        settings = self.obs_text_switcher.get_settings()
+        with self.condition:
+            if settings == (self.pending or self.persisted):
+                return
+            self.pending = settings
+            self.due_time = time.monotonic() + self.save_delay
+            self.condition.notify()
+
+    def stop(self, flush=True):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if flush and self.is_alive():
+            self.join(STOP_TIMEOUT)
+
+    def _connected(self):
+        with self.condition:
+            self.resync = True
+            if self.pending is not None:
+                self.due_time = time.monotonic()
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and self.due_time is None and not self.resync:
+                    self.condition.wait()
+                resync = self.running and self.resync
+                self.resync = False
+                if self.running and not resync:
+                    if not self.obs_text_switcher.is_connected():
+                        # Written once OBS is back, see _connected
+                        self.due_time = None
+                        continue
+                    delay = self.due_time - time.monotonic()
+                    if delay > 0:
+                        self.condition.wait(delay)
+                        continue
+                    if self.obs_text_switcher.is_transition_active():
+                        # Cues are happening right now, don't compete with them
+                        self.due_time = time.monotonic() + self.save_delay
+                        continue
+                if not resync:
+                    settings = self.pending
+                    self.due_time = None
+                running = self.running
+
+            if resync:
+                self._load_from_obs()
+            elif settings is not None and not self._write(settings) and running:
+                with self.condition:
+                    if self.pending is settings and self.due_time is None:
+                        self.due_time = time.monotonic() + RETRY_DELAY
+            if not running:
+                return
+
+    def _write(self, settings):
+        self._write_cache(settings)
+        try:
+            if not self.obs_text_switcher.save_settings(settings):
+                raise IOError("OBS did not accept the settings")
+        except Exception as e:
+            LOG.warning("Could not save the settings in OBS: %s", e)
+            return False
+        with self.condition:
+            self.persisted = settings
+            if self.pending is settings:
+                self.pending = None
+        return True
+
+    def _load_from_obs(self):
+        try:
+            settings = self.obs_text_switcher.fetch_settings()
+        except Exception as e:
+            LOG.warning("Could not load the settings from OBS: %s", e)
+            settings = None
+        with self.condition:
+            # Changes made in the meantime win over what OBS had
+            apply = settings is not None and self.pending is None and settings != self.persisted
+            if apply:
+                self.obs_text_switcher.apply_settings(settings)
+                self.persisted = settings
+        if apply:
+            self._write_cache(settings)
+        self.loaded.set()
+        if apply:
+            for listener in self.listeners:
+                listener()
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, encoding="utf8") as file:
+                settings = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return settings if isinstance(settings, dict) else None
+
+    def _write_cache(self, settings):
+        temp_path = f"{self.cache_path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf8") as file:
+                json.dump(settings, file)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            LOG.warning("Could not write the settings cache %s: %s", self.cache_path, e)
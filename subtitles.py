@@ -0,0 +1,221 @@
+import re
+import time
+import bisect
+import threading
+import logging
+from typing import NamedTuple
+from config import SUBTITLE_MIN_GAP, SUBTITLE_PARSE_AHEAD, CUE_TIMER_ARM_LEAD
+
+LOG = logging.getLogger(__name__)
+
+TIMESTAMP = r"(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{3})"  # hours are optional in WebVTT
+CUE_TIMING_PATTERN = re.compile(rf"{TIMESTAMP}\s*-->\s*{TIMESTAMP}")
+TAG_PATTERN = re.compile(r"<[^>]*>")  # <i>, <b>, <font ...> in SRT, <v Speaker>, <c.class> and timestamps in WebVTT
+
+
+class Subtitle(NamedTuple):
+    start: float  # seconds
+    end: float
+    text: str
+
+
+def _seconds(hours, minutes, seconds, milliseconds):
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(milliseconds) / 1000
+
+
+def parse_subtitles(lines):
+    """
+    Yields the Subtitles of SRT or WebVTT lines, only reading as far as the caller iterates.
+    The lines of a multi-line subtitle are joined with a space, since the script has one line per cue.
+    """
+    timing = None
+    text_lines = []
+    for line in lines:
+        line = line.strip()
+        match = CUE_TIMING_PATTERN.search(line)
+        if match:
+            timing = _seconds(*match.groups()[:4]), _seconds(*match.groups()[4:])
+            text_lines = []
+        elif line:
+            # Counters, the WEBVTT header and NOTE/STYLE blocks have no timing and are skipped
+            if timing is not None:
+                text_lines.append(TAG_PATTERN.sub("", line))
+        elif timing is not None:
+            yield Subtitle(*timing, " ".join(text_lines))
+            timing = None
+    if timing is not None:
+        yield Subtitle(*timing, " ".join(text_lines))
+
+
+class PlaybackClock:
+    """
+    Playback position in seconds on the monotonic clock, which can be paused and moved.
+    """
+
+    def __init__(self):
+        self.offset = 0.0
+        self.start_time = None  # monotonic time the playback was (re)started at, None while paused
+
+    def is_running(self):
+        return self.start_time is not None
+
+    def position(self):
+        if self.start_time is None:
+            return self.offset
+        return self.offset + time.monotonic() - self.start_time
+
+    def play(self):
+        if self.start_time is None:
+            self.start_time = time.monotonic()
+
+    def pause(self):
+        self.offset = self.position()
+        self.start_time = None
+
+    def seek(self, position):
+        self.offset = position
+        if self.start_time is not None:
+            self.start_time = time.monotonic()
+
+
+class SubtitlePlayer(threading.Thread):
+    """
+    Shows and hides the subtitles of a timed script on a CueEngine as a PlaybackClock passes them.
+    The file is parsed lazily, SUBTITLE_PARSE_AHEAD seconds ahead of the playback position, and the parsed
+    subtitles are appended to the engine's lines, so a long file starts playing at once.
+    The lines keep the order of the file, the timing is looked up in a list sorted by start time, since
+    subtitle files aren't guaranteed to be in time order. Once a file turns out not to be, the rest of it is parsed.
+    Cues are fired early by the OBS latency the engine measured, so the text lands on time.
+    """
+
+    def __init__(self, engine, file):
+        super().__init__(name="SubtitlePlayer", daemon=True)
+        self.engine = engine
+        self.file = file
+        self.subtitles = parse_subtitles(file)
+        self.starts = []  # sorted
+        self.ends = []
+        self.line_indexes = []  # line index of the subtitle at the same position in starts
+        self.parsed = 0
+        self.last_start = None  # start of the subtitle parsed last, which isn't the latest one if out of order
+        self.ordered = True  # False once a subtitle started before the one above it, the rest is parsed then
+        self.exhausted = False
+        self.clock = PlaybackClock()
+        self.condition = threading.Condition()
+        self.running = True
+        self.shown = None  # index of the subtitle that was cued last, None if the text was hidden
+        self.armed = None
+        with self.condition:
+            self._parse_until(0)
+        self.start()
+
+    def play(self):
+        with self.condition:
+            self.clock.play()
+            self.condition.notify()
+
+    def pause(self):
+        with self.condition:
+            self.clock.pause()
+            self.condition.notify()
+
+    def seek(self, position):
+        with self.condition:
+            self.clock.seek(max(0.0, position))
+            # The staged subtitle may not be the next one anymore
+            self.armed = None
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            if not self.exhausted:
+                self.file.close()
+            self.condition.notify()
+
+    def get_state(self):
+        with self.condition:
+            return dict(position=self.clock.position(), playing=self.clock.is_running(), parsed=self.parsed,
+                        complete=self.exhausted, shown=self.shown)
+
+    def _parse_until(self, position):
+        # Must be called with the lock held
+        texts = []
+        while not self.exhausted and (not self.ordered or self.last_start is None
+                                      or self.last_start <= position + SUBTITLE_PARSE_AHEAD):
+            subtitle = next(self.subtitles, None)
+            if subtitle is None:
+                self.exhausted = True
+                self.file.close()
+                break
+            if self.last_start is not None and subtitle.start < self.last_start:
+                # The parse ahead can't tell how far back the next subtitle goes anymore
+                self.ordered = False
+            index = bisect.bisect_right(self.starts, subtitle.start)
+            self.starts.insert(index, subtitle.start)
+            self.ends.insert(index, subtitle.end)
+            self.line_indexes.insert(index, self.parsed)
+            self.parsed += 1
+            self.last_start = subtitle.start
+            texts.append(subtitle.text)
+        if texts:
+            self.engine.append_lines(texts)
+
+    def _target_at(self, position):
+        """
+        Returns the line index of the subtitle to show at position (None to hide the text) and when that changes next.
+        """
+        self._parse_until(position)
+        index = bisect.bisect_right(self.starts, position) - 1
+        next_start = self.starts[index + 1] if index + 1 < len(self.starts) else None
+        if index >= 0:
+            end = self.ends[index]
+            if next_start is not None and next_start - end < SUBTITLE_MIN_GAP:
+                # Keep the text up through short gaps instead of hiding it for a moment
+                end = next_start
+            if position < end:
+                return self.line_indexes[index], end
+        return None, next_start
+
+    def run(self):
+        while True:
+            arm = None
+            with self.condition:
+                if not self.running:
+                    return
+                if not self.clock.is_running():
+                    self.condition.wait()
+                    continue
+                position = self.clock.position() + self.engine.cue_latency.value
+                target, next_change = self._target_at(position)
+                if target == self.shown:
+                    if next_change is None:
+                        # Played to the end, wait for a seek
+                        self.condition.wait()
+                        continue
+                    delay = next_change - position
+                    parsed = self.parsed
+                    next_target, _ = self._target_at(next_change)
+                    if self.parsed != parsed:
+                        # The new subtitles may start before next_change (out of order files)
+                        continue
+                    if next_target is None or next_target == self.armed:
+                        self.condition.wait(delay)
+                        continue
+                    if delay > CUE_TIMER_ARM_LEAD:
+                        # Wake up in time to stage the next subtitle's text
+                        self.condition.wait(delay - CUE_TIMER_ARM_LEAD)
+                        continue
+                    arm = self.armed = next_target
+                else:
+                    self.shown = target
+
+            try:
+                if arm is not None:
+                    self.engine.arm_line(arm)
+                elif target is None:
+                    self.engine.hide_text()
+                else:
+                    self.engine.switch_to_line_index(target)
+            except Exception:
+                LOG.exception("Could not cue subtitle %s", arm if arm is not None else target)
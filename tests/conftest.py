@@ -0,0 +1,55 @@
+import time
+import pytest
+import obs_text
+from fake_obs_server import FakeOBSServer
+from tests.helpers import wait_until
+
+SETTINGS = dict(scene1="Text 1", scene2="Text 2", source1="Text Source 1", source2="Text Source 2")
+
+
+@pytest.fixture
+def stop_later():
+    """
+    Registers threads (anything with a stop method) that are stopped after the test: stop_later(obj) returns obj.
+    """
+    stoppable = []
+
+    def register(obj):
+        stoppable.append(obj)
+        return obj
+
+    yield register
+    for obj in reversed(stoppable):
+        obj.stop()
+
+
+@pytest.fixture
+def obs():
+    """
+    A fake OBS with short transitions, running until the end of the test.
+    """
+    server = FakeOBSServer("127.0.0.1", 0, transition_duration=0.05)
+    server.start_in_thread()
+    yield server
+    server.stop_thread()
+
+
+@pytest.fixture
+def connect_switcher():
+    """
+    connect_switcher(server, **kwargs) returns an OBSTextSwitcher connected to the server with SETTINGS applied.
+    """
+    switchers = []
+
+    def connect(server, **kwargs):
+        switcher = obs_text.OBSTextSwitcher("127.0.0.1", server.port, **kwargs)
+        switchers.append(switcher)
+        switcher.apply_settings(SETTINGS)
+        assert wait_until(switcher.is_connected)
+        return switcher
+
+    yield connect
+    for switcher in switchers:
+        switcher.disconnect()
+    # Lets the receive threads notice the closed connections before the servers stop
+    time.sleep(0.01)
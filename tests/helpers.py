@@ -0,0 +1,67 @@
+import time
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+class FakeSwitcher:
+    """
+    Stands in for OBSTextSwitcher: records the texts it was cued and armed with, busy while busy is set.
+    """
+
+    def __init__(self):
+        self.busy = False
+        self.connected = True
+        self.configured = True
+        self.texts = []
+        self.armed = []
+        self.upcoming = None
+        self.targets = ("Text 1", "Text 2")
+        self.transition_ended_listeners = []
+        self.connected_listeners = []
+
+    def is_busy(self):
+        return self.busy
+
+    def is_connected(self):
+        return self.connected
+
+    def is_configured(self):
+        return self.configured
+
+    def get_targets(self):
+        return self.targets
+
+    def compile_text(self, text):
+        return self.targets, text
+
+    def switch_text(self, new_text, compiled=None, sequence=None):
+        if self.busy or not self.configured:
+            return False
+        self.texts.append(new_text)
+        return True
+
+    def arm_text(self, text):
+        self.armed.append(text)
+
+    def set_upcoming_text(self, text):
+        self.upcoming = text
+
+    def get_instance_stats(self):
+        return {}
+
+    def end_transition(self):
+        self.busy = False
+        for listener in self.transition_ended_listeners:
+            listener()
+
+
+def emit_event(server, event_type, event_data=None):
+    # Events of a FakeOBSServer have to be sent from its event loop
+    server.loop.call_soon_threadsafe(server.broadcast_event, event_type, event_data)
@@ -0,0 +1,119 @@
+import pytest
+import config
+from cue_engine import CueEngine
+from tests.helpers import FakeSwitcher, wait_until
+
+
+@pytest.fixture
+def make_engine(stop_later):
+    def make(lines=(), policy=config.CUE_QUEUE_POLICY):
+        switcher = FakeSwitcher()
+        engine = stop_later(CueEngine(switcher, policy, stats_dump_path=None))
+        engine.append_lines(list(lines))
+        return engine, switcher
+
+    return make
+
+
+def test_next_previous_and_hide(make_engine):
+    engine, switcher = make_engine(["one", "two", "three"])
+    engine.next_line()
+    engine.next_line()
+    engine.prev_line()
+    engine.hide_text()
+    assert wait_until(lambda: switcher.texts == ["one", "two", "one", ""])
+    assert engine.active_index == 0
+
+
+def test_upcoming_text_follows_the_active_line(make_engine):
+    engine, switcher = make_engine(["one", "two"])
+    assert switcher.upcoming == "one"
+    engine.switch_to_line_index(0)
+    assert wait_until(lambda: switcher.upcoming == "two")
+    engine.switch_to_line_index(1)
+    assert wait_until(lambda: engine.active_index == 1 and switcher.upcoming is None)
+
+
+def test_cues_past_the_last_line_are_skipped(make_engine):
+    engine, switcher = make_engine(["one"])
+    engine.switch_to_line_index(0)
+    engine.next_line()
+    assert wait_until(lambda: engine.cue_scheduler.get_stats()["skipped"] == 1)
+    assert switcher.texts == ["one"]
+    assert engine.active_index == 0
+
+
+def test_cues_wait_for_the_transition(make_engine):
+    engine, switcher = make_engine(["one", "two"])
+    switcher.busy = True
+    engine.next_line()
+    engine.next_line()
+    assert not wait_until(lambda: switcher.texts, timeout=0.2)
+    switcher.end_transition()
+    assert wait_until(lambda: switcher.texts == ["one", "two"])
+
+
+def test_edits_keep_the_active_line(make_engine):
+    engine, switcher = make_engine(["one", "two", "three"])
+    engine.switch_to_line_index(1)
+    assert wait_until(lambda: engine.active_index == 1)
+    engine.insert_line("zero", 0)
+    assert engine.active_index == 2
+    engine.remove_line(0)
+    engine.set_line_text(2, "THREE")
+    assert engine.lines == ["one", "two", "THREE"]
+    assert engine.active_index == 1
+    assert switcher.upcoming == "THREE"
+    assert engine.file_dirty
+
+
+def test_find_lines_prefers_lines_after_the_active_one(make_engine):
+    engine, switcher = make_engine(["Chorus", "verse", "chorus!"])
+    assert engine.find_line("chorus") == 0
+    engine.switch_to_line_index(1)
+    assert wait_until(lambda: engine.active_index == 1)
+    assert engine.find_line("chorus") == 2
+    assert engine.find_line("vers") == 1
+
+
+def test_unsaved_edits_are_recovered(make_engine, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "SCRIPT_JOURNAL_ENABLED", True)
+    path = tmp_path / "script.txt"
+    path.write_text("one\ntwo\n", encoding="utf8")
+    engine, _ = make_engine()
+    engine.load_file_from_path(str(path))
+    engine.insert_line("three")
+    engine.set_line_text(0, "ONE")
+
+    # Loaded again without saving, as after a crash
+    engine, _ = make_engine()
+    engine.load_file_from_path(str(path))
+    assert engine.lines == ["ONE", "two", "three"]
+    assert engine.recovered_edits == 2
+    assert engine.file_dirty
+
+    engine.save_current_file()
+    assert path.read_text(encoding="utf8") == "ONE\ntwo\nthree\n"
+    assert not (tmp_path / "script.txt.journal").exists()
+    assert not engine.file_dirty
+
+
+def test_cues_reach_obs(obs, connect_switcher, stop_later):
+    switcher = connect_switcher(obs)
+    engine = stop_later(CueEngine(switcher, stats_dump_path=None))
+    engine.append_lines(["one", "two", "three"])
+    for _ in range(3):
+        engine.next_line()
+    assert wait_until(lambda: engine.active_index == 2 and not switcher.is_busy())
+    assert obs.program_scene == "Text 2"
+    assert obs.inputs == {"Text Source 1": {"text": "two"}, "Text Source 2": {"text": "three"}}
+    assert engine.cue_scheduler.get_stats()["fired"] == obs.request_counts["SetCurrentProgramScene"] == 3
+
+
+def test_cues_without_a_selection_are_skipped(make_engine):
+    engine, switcher = make_engine(["one"])
+    switcher.configured = False
+    engine.next_line()
+    assert wait_until(lambda: engine.cue_scheduler.get_stats()["skipped"] == 1)
+    assert engine.cue_scheduler.get_stats()["fired"] == 0
+    assert engine.active_index == -1
@@ -0,0 +1,115 @@
+import time
+import pytest
+from cue_scheduler import CueScheduler, POLICY_QUEUE, POLICY_COALESCE, POLICY_DROP, SKIPPED
+from tests.helpers import wait_until
+
+
+class Target:
+    def __init__(self, busy=True):
+        self.busy = busy
+        self.fired = []
+        self.results = []  # returned by the next fires, True afterwards
+        self.active_index = 0
+
+    def fire(self, cue):
+        result = self.results.pop(0) if self.results else True
+        if result is True:
+            self.fired.append(cue.line_index)
+        return result
+
+
+@pytest.fixture
+def make_scheduler(stop_later):
+    def make(target, policy, **kwargs):
+        return stop_later(CueScheduler(target.fire, lambda: target.busy, lambda: target.active_index, policy, **kwargs))
+
+    return make
+
+
+def release(scheduler, target):
+    target.busy = False
+    scheduler.notify_ready()
+
+
+def test_queue_fires_every_cue_in_order(make_scheduler):
+    target = Target()
+    scheduler = make_scheduler(target, POLICY_QUEUE)
+    for line_index in (3, 1, 2):
+        assert scheduler.submit_line(line_index)
+    assert target.fired == []
+    release(scheduler, target)
+    assert wait_until(lambda: target.fired == [3, 1, 2])
+    assert scheduler.get_stats()["max_depth"] == 3
+
+
+def test_queue_drops_cues_beyond_max_pending(make_scheduler):
+    target = Target()
+    scheduler = make_scheduler(target, POLICY_QUEUE, max_pending=2)
+    assert scheduler.submit_line(1)
+    assert scheduler.submit_line(2)
+    assert not scheduler.submit_line(3)
+    release(scheduler, target)
+    assert wait_until(lambda: target.fired == [1, 2])
+    assert scheduler.get_stats()["dropped"] == 1
+
+
+def test_coalesce_only_fires_the_latest_cue(make_scheduler):
+    target = Target()
+    scheduler = make_scheduler(target, POLICY_COALESCE)
+    for line_index in (1, 2, 3):
+        scheduler.submit_line(line_index)
+    release(scheduler, target)
+    assert wait_until(lambda: target.fired == [3])
+    assert scheduler.get_stats()["coalesced"] == 2
+
+
+def test_drop_ignores_cues_while_busy(make_scheduler):
+    target = Target()
+    scheduler = make_scheduler(target, POLICY_DROP)
+    assert not scheduler.submit_line(1)
+    release(scheduler, target)
+    assert scheduler.submit_line(2)
+    assert wait_until(lambda: target.fired == [2])
+    stats = scheduler.get_stats()
+    assert (stats["submitted"], stats["dropped"], stats["fired"]) == (2, 1, 1)
+
+
+def test_next_and_previous_are_relative_to_the_last_queued_cue(make_scheduler):
+    target = Target()
+    target.active_index = 4
+    scheduler = make_scheduler(target, POLICY_QUEUE)
+    scheduler.submit_next()
+    scheduler.submit_next()
+    scheduler.submit_previous()
+    assert scheduler.get_target_index() == 5
+    release(scheduler, target)
+    assert wait_until(lambda: target.fired == [5, 6, 5])
+
+
+def test_busy_fire_is_retried_and_skipped_cues_are_counted(make_scheduler):
+    target = Target()
+    # The first cue is kept at the front when OBS turns out to be busy, then there's nothing to do for it
+    target.results = [False, SKIPPED]
+    scheduler = make_scheduler(target, POLICY_QUEUE)
+    scheduler.submit_line(1)
+    scheduler.submit_line(2)
+    scheduler.submit_line(3)
+    release(scheduler, target)
+    assert wait_until(lambda: scheduler.get_stats()["fired"] == 2)
+    assert target.fired == [2, 3]
+    stats = scheduler.get_stats()
+    assert (stats["submitted"], stats["skipped"], stats["depth"]) == (3, 1, 0)
+
+
+def test_missing_transition_end_holds_cues_for_the_transition_duration(obs, connect_switcher):
+    async def never_ends(duration):
+        pass
+
+    obs._end_transition = never_ends
+    switcher = connect_switcher(obs)
+    assert switcher.transition_duration == 0.05
+    assert switcher.switch_text("one")
+    start = time.monotonic()
+    assert switcher.is_busy()
+    assert wait_until(lambda: not switcher.is_busy())
+    assert 0.4 < time.monotonic() - start < 1.0
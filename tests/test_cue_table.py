@@ -0,0 +1,66 @@
+from cue_table import CueTable
+from tests.helpers import wait_until
+
+
+class Compiler:
+    def __init__(self):
+        self.key = "A"
+        self.compiled = []
+
+    def compile(self, text):
+        self.compiled.append(text)
+        return self.key, text
+
+
+def test_entries_are_compiled_once():
+    compiler = Compiler()
+    cue_table = CueTable(compiler.compile, lambda: compiler.key)
+    cue_table.rebuild(2)
+    assert cue_table.get(0, "one") == ("A", "one")
+    assert cue_table.get(0, "one") == ("A", "one")
+    assert compiler.compiled == ["one"]
+    assert cue_table.get_stats() == dict(lines=2, cached=1, compiled=1)
+
+
+def test_selection_change_invalidates_every_entry():
+    compiler = Compiler()
+    cue_table = CueTable(compiler.compile, lambda: compiler.key)
+    cue_table.rebuild(2)
+    cue_table.get(0, "one")
+    cue_table.get(1, "two")
+    compiler.key = "B"
+    assert cue_table.get(1, "two") == ("B", "two")
+    assert cue_table.get_stats()["cached"] == 1
+
+
+def test_edits_keep_entries_in_line():
+    compiler = Compiler()
+    cue_table = CueTable(compiler.compile, lambda: compiler.key)
+    cue_table.rebuild(2)
+    cue_table.get(0, "one")
+    cue_table.get(1, "two")
+    cue_table.insert(1)
+    cue_table.append(1)
+    assert cue_table.get(2, "two") == ("A", "two")
+    cue_table.remove(0)
+    assert cue_table.get(1, "two") == ("A", "two")
+    cue_table.update(1)
+    assert cue_table.get(1, "TWO") == ("A", "TWO")
+    assert compiler.compiled == ["one", "two", "TWO"]
+    assert cue_table.get_stats()["lines"] == 3
+
+
+def test_compiled_entries_cue_obs(obs, connect_switcher):
+    switcher = connect_switcher(obs)
+    cue_table = CueTable(switcher.compile_text, switcher.get_targets)
+    cue_table.rebuild(1)
+    assert switcher.switch_text("hello", cue_table.get(0, "hello"))
+    assert obs.program_scene == "Text 2"
+    assert obs.inputs["Text Source 2"]["text"] == "hello"
+    # A compiled entry of another selection isn't used
+    stale = cue_table.entries[0]
+    switcher.source1 = "Text Source 2"
+    assert wait_until(lambda: not switcher.is_busy())
+    assert switcher.switch_text("again", stale)
+    assert obs.inputs["Text Source 2"]["text"] == "again"
+    assert obs.inputs["Text Source 1"]["text"] == ""
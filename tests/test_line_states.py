@@ -0,0 +1,26 @@
+from line_states import LineStates, ACTIVE, PREVIEW
+
+
+def test_update_returns_only_changed_rows():
+    line_states = LineStates()
+    assert line_states.update(0, 10) == [0, 1]
+    assert line_states.update(1, 10) == [0, 1, 2]
+    assert line_states.update(1, 10) == []
+    assert line_states.update(5, 10) == [1, 2, 5, 6]
+    assert line_states.painted == {5: ACTIVE, 6: PREVIEW}
+
+
+def test_no_preview_after_the_last_line():
+    assert LineStates.get_states(2, 3) == {2: ACTIVE}
+    assert LineStates.get_states(-1, 3) == {0: PREVIEW}
+
+
+def test_shift_follows_inserted_and_removed_lines():
+    line_states = LineStates()
+    line_states.update(4, 10)
+    line_states.shift(2, 1)
+    assert line_states.painted == {5: ACTIVE, 6: PREVIEW}
+    line_states.shift(5, -1)
+    assert line_states.painted == {5: PREVIEW}
+    line_states.shift(6, -1)
+    assert line_states.painted == {5: PREVIEW}
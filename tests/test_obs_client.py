@@ -0,0 +1,75 @@
+import threading
+import time
+import pytest
+from obswebsocket import requests as obsrequests
+from obs_client import OBSClient, encode_request, encode_batch
+
+
+def test_requests_in_flight_are_limited(obs):
+    obs.response_delay = 0.05
+    client = OBSClient("127.0.0.1", obs.port, max_in_flight=2)
+    client.connect()
+    try:
+        threads = [threading.Thread(target=client.call, args=(obsrequests.GetVersion(),)) for _ in range(6)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Three rounds of two pipelined requests
+        assert 0.14 < time.monotonic() - start < 0.5
+        assert obs.request_counts["GetVersion"] == 6
+        assert client.events == {}
+    finally:
+        client.disconnect()
+
+
+def test_encoded_requests_and_batches(obs):
+    client = OBSClient("127.0.0.1", obs.port)
+    client.connect()
+    try:
+        status = client.call_encoded(encode_request(obsrequests.SetCurrentProgramScene(sceneName="Text 2")))
+        assert status["result"]
+        statuses = client.call_encoded_batch(encode_batch([
+            obsrequests.SetInputSettings(inputName="Text Source 1", inputSettings={"text": "cued"}),
+            obsrequests.SetCurrentProgramScene(sceneName="Text 1")]))
+        assert [status["result"] for status in statuses] == [True, True]
+        assert obs.program_scene == "Text 1"
+        assert obs.inputs["Text Source 1"]["text"] == "cued"
+    finally:
+        client.disconnect()
+
+
+def test_failed_send_frees_the_request(obs):
+    client = OBSClient("127.0.0.1", obs.port, max_in_flight=1)
+    client.connect()
+    try:
+        send = client.ws.send
+
+        def fail(_):
+            raise OSError("Broken pipe")
+
+        client.ws.send = fail
+        with pytest.raises(OSError):
+            client.call_encoded(encode_request(obsrequests.GetVersion()))
+        assert client.events == {}
+        client.ws.send = send
+        # The only slot is free again
+        assert client.call(obsrequests.GetVersion()).status
+    finally:
+        client.disconnect()
+
+
+def test_batch_halts_on_failure(obs):
+    client = OBSClient("127.0.0.1", obs.port)
+    client.connect()
+    try:
+        requests = client.call_batch([obsrequests.GetCurrentProgramScene(),
+                                      obsrequests.SetCurrentProgramScene(sceneName="Missing"),
+                                      obsrequests.SetCurrentProgramScene(sceneName="Text 2")])
+        assert [request.status for request in requests] == [True, False, None]
+        assert requests[0].getCurrentProgramSceneName() == "Text 1"
+        assert requests[1].comment
+        assert obs.program_scene == "Text 1"
+    finally:
+        client.disconnect()
@@ -0,0 +1,61 @@
+import time
+import pytest
+import obs_text
+from fake_obs_server import FakeOBSServer
+from obs_mirror import OBSMirror
+from tests.helpers import wait_until
+
+
+@pytest.fixture
+def mirrored(obs, connect_switcher):
+    """
+    A switcher for obs with a mirror on a second fake OBS, whose responses take 0.2 s.
+    """
+    mirror_obs = FakeOBSServer("127.0.0.1", 0, transition_duration=0.05, response_delay=0.2)
+    mirror_obs.start_in_thread()
+    switcher = connect_switcher(obs)
+    switcher.add_mirror(OBSMirror("mirror", connect_switcher(mirror_obs)))
+    yield switcher, mirror_obs
+    mirror_obs.stop_thread()
+
+
+def test_slow_mirror_doesnt_delay_the_cue(obs, mirrored):
+    switcher, mirror_obs = mirrored
+    start = time.monotonic()
+    assert switcher.switch_text("hello")
+    assert time.monotonic() - start < 0.15
+    assert obs.program_scene == "Text 2"
+    assert wait_until(lambda: mirror_obs.program_scene == "Text 2")
+    assert mirror_obs.inputs["Text Source 2"]["text"] == "hello"
+
+
+def test_repeated_text_reaches_the_mirror(obs, mirrored):
+    switcher, mirror_obs = mirrored
+    for sequence in (1, 2):
+        assert wait_until(lambda: not switcher.is_busy())
+        assert switcher.switch_text("same", sequence=sequence)
+        assert wait_until(lambda: mirror_obs.request_counts["SetCurrentProgramScene"] == sequence, timeout=3)
+
+
+def test_retried_cue_reaches_the_mirror_once(obs, mirrored):
+    switcher, mirror_obs = mirrored
+    mirror = switcher.mirrors[0]
+    cued = []
+    mirror.cue = lambda text, settings: cued.append(text)
+    # A cue that failed because the connection was lost already went to the mirrors
+    switcher.retried_cue = 7
+    assert switcher.switch_text("hello", sequence=7)
+    assert cued == []
+    assert wait_until(lambda: not switcher.is_busy())
+    assert switcher.switch_text("hello", sequence=8)
+    assert cued == ["hello"]
+
+
+def test_mirrors_get_cues_while_the_main_instance_is_down(obs, mirrored):
+    switcher, mirror_obs = mirrored
+    obs.stop_thread()
+    assert wait_until(lambda: not switcher.is_connected())
+    assert not switcher.is_busy()
+    assert switcher.switch_text("standby")
+    assert wait_until(lambda: mirror_obs.inputs["Text Source 2"]["text"] == "standby")
+    assert switcher.get_instance_stats()[f"127.0.0.1:{obs.port}"]["connected"] is False
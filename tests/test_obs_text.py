@@ -0,0 +1,89 @@
+import time
+import pytest
+from obs_text import CueError
+from tests.helpers import emit_event, wait_until
+
+
+def cue(switcher, text):
+    assert wait_until(lambda: not switcher.is_busy())
+    assert switcher.switch_text(text)
+
+
+def test_cues_use_the_program_scene_from_events(obs, connect_switcher):
+    switcher = connect_switcher(obs)
+    assert switcher.program_scene == "Text 1"
+    for text in ("one", "two", "three"):
+        cue(switcher, text)
+    assert obs.program_scene == "Text 2"
+    assert obs.request_counts["GetCurrentProgramScene"] == 1
+
+    # Switched in OBS by someone else
+    obs.program_scene = "Text 1"
+    emit_event(obs, "CurrentProgramSceneChanged", {"sceneName": "Text 1"})
+    assert wait_until(lambda: switcher.program_scene == "Text 1")
+    cue(switcher, "four")
+    assert obs.program_scene == "Text 2"
+    assert obs.inputs["Text Source 2"]["text"] == "four"
+    assert obs.request_counts["GetCurrentProgramScene"] == 1
+
+
+def test_renamed_scene_is_followed(obs, connect_switcher):
+    switcher = connect_switcher(obs)
+    obs.scenes["Renamed"] = obs.scenes.pop("Text 1")
+    obs.program_scene = "Renamed"
+    emit_event(obs, "SceneNameChanged", {"oldSceneName": "Text 1", "sceneName": "Renamed"})
+    assert wait_until(lambda: switcher.scene1 == "Renamed")
+    assert switcher.program_scene == "Renamed"
+    cue(switcher, "one")
+    assert obs.program_scene == "Text 2"
+
+
+def test_cue_is_one_batch(obs, connect_switcher):
+    switcher = connect_switcher(obs)
+    cue(switcher, "one")
+    assert obs.request_counts["SetInputSettings"] == obs.request_counts["SetCurrentProgramScene"] == 1
+    assert (obs.program_scene, obs.inputs["Text Source 2"]["text"]) == ("Text 2", "one")
+
+
+def test_failed_text_halts_the_batch(obs, connect_switcher):
+    switcher = connect_switcher(obs)
+    switcher.source2 = "Missing"
+    with pytest.raises(CueError):
+        switcher.switch_text("one")
+    assert obs.program_scene == "Text 1"
+    assert obs.request_counts["SetCurrentProgramScene"] == 0
+
+
+def test_prestaged_text_makes_the_cue_a_scene_switch(obs, connect_switcher):
+    switcher = connect_switcher(obs)
+    switcher.prestage_text = True
+    switcher.set_upcoming_text("next")
+    assert wait_until(lambda: obs.inputs["Text Source 2"]["text"] == "next")
+    # Our own settings change echoed by OBS doesn't drop the staged text
+    assert wait_until(lambda: obs.request_counts["SetInputSettings"] == 1)
+    time.sleep(0.05)
+    cue(switcher, "next")
+    assert obs.program_scene == "Text 2"
+    assert obs.request_counts["SetInputSettings"] == 1
+    assert obs.request_counts["SetCurrentProgramScene"] == 1
+
+
+def test_armed_text_is_staged_after_the_transition(obs, connect_switcher):
+    switcher = connect_switcher(obs)
+    cue(switcher, "one")
+    switcher.arm_text("two")
+    assert wait_until(lambda: obs.inputs["Text Source 1"]["text"] == "two")
+    cue(switcher, "two")
+    assert obs.program_scene == "Text 1"
+    assert obs.request_counts["SetInputSettings"] == 2
+
+
+def test_text_changed_by_someone_else_is_written_again(obs, connect_switcher):
+    switcher = connect_switcher(obs)
+    switcher.arm_text("next")
+    assert wait_until(lambda: switcher.source_texts.get("Text Source 2") == "next")
+    obs.inputs["Text Source 2"]["text"] = "typed in OBS"
+    emit_event(obs, "InputSettingsChanged", {"inputName": "Text Source 2", "inputSettings": {"text": "typed in OBS"}})
+    assert wait_until(lambda: "Text Source 2" not in switcher.source_texts)
+    cue(switcher, "next")
+    assert obs.inputs["Text Source 2"]["text"] == "next"
@@ -0,0 +1,61 @@
+import time
+import pytest
+import config
+from cue_engine import CueEngine
+from pythonosc.udp_client import SimpleUDPClient
+from osc_server import OSCServer
+from tests.helpers import FakeSwitcher, wait_until
+
+
+@pytest.fixture
+def server(stop_later):
+    switcher = FakeSwitcher()
+    engine = stop_later(CueEngine(switcher, config.CUE_QUEUE_POLICY, stats_dump_path=None))
+    engine.append_lines([f"Line {index}" for index in range(10)])
+    osc_server = OSCServer(engine, "127.0.0.1", 0)
+    yield osc_server, engine, switcher
+    osc_server.shutdown()
+
+
+def test_integral_float_is_a_line_index(server):
+    osc_server, engine, switcher = server
+    osc_server.handle(osc_server.next_text, engine, False, "/obstext/next", 3.0)
+    assert wait_until(lambda: switcher.texts == ["Line 3"])
+
+
+def test_malformed_jump_is_ignored(server):
+    osc_server, engine, switcher = server
+    osc_server.handle(osc_server.next_text, engine, False, "/obstext/next", 2.5)
+    osc_server.handle(osc_server.next_text, engine, False, "/obstext/next", "x")
+    osc_server.handle(osc_server.next_text, engine, False, "/obstext/next")
+    assert wait_until(lambda: switcher.texts == ["Line 0"])
+    time.sleep(0.05)
+    assert switcher.texts == ["Line 0"]
+    assert engine.cue_scheduler.get_stats()["submitted"] == 1
+
+
+def test_delayed_cue_fires_the_line_it_armed(server):
+    osc_server, engine, switcher = server
+    osc_server.handle(osc_server.next_text, engine, True, "/obstext/next/delayed", 0.3)
+    assert wait_until(lambda: switcher.armed == ["Line 0"])
+    # The cursor moves before the delayed cue fires
+    engine.switch_to_line_index(5)
+    assert wait_until(lambda: switcher.texts == ["Line 5"])
+    assert wait_until(lambda: switcher.texts == ["Line 5", "Line 0"])
+
+
+def test_delayed_address_needs_a_delay(server):
+    osc_server, engine, switcher = server
+    osc_server.handle(osc_server.hide_text, engine, True, "/obstext/hide/delayed")
+    time.sleep(0.1)
+    assert switcher.texts == []
+
+
+def test_addresses_over_udp(server):
+    osc_server, engine, switcher = server
+    client = SimpleUDPClient("127.0.0.1", osc_server.server.server_address[1])
+    client.send_message("/obstext/next", 2)
+    assert wait_until(lambda: switcher.texts == ["Line 2"])
+    client.send_message("/obstext/previous/delayed", [0.05])
+    client.send_message("/obstext/goto", "line 7")
+    assert wait_until(lambda: switcher.texts == ["Line 2", "Line 7", "Line 1"])
@@ -0,0 +1,64 @@
+import obs_client
+import obs_text
+from fake_obs_server import FakeOBSServer
+from cue_engine import CueEngine
+from settings_store import SettingsStore
+from tests.conftest import SETTINGS
+from tests.helpers import wait_until
+
+
+def test_connect_listeners_run_when_the_program_scene_cant_be_fetched(obs):
+    client = obs_client.OBSClient("127.0.0.1", obs.port)
+    switcher = obs_text.OBSTextSwitcher(client=client)
+    connected = []
+    switcher.connected_listeners.append(lambda: connected.append(True))
+
+    def fail():
+        raise obs_client.exceptions.MessageTimeout("No answer")
+
+    switcher.get_program_scene = fail
+    client.connect()
+    try:
+        assert connected == [True]
+        assert switcher.program_scene is None
+        assert switcher.transition_duration == 0.05
+        # The first cue fetches it
+        del switcher.get_program_scene
+        switcher.apply_settings(SETTINGS)
+        assert switcher.get_off_air_target() == ("Text 2", "Text Source 2")
+    finally:
+        client.disconnect()
+
+
+def test_cues_wait_for_the_reconnect_and_settings_are_resynced(obs, connect_switcher, stop_later, monkeypatch,
+                                                               tmp_path):
+    monkeypatch.setattr(obs_client, "OBS_RECONNECT_MIN_DELAY", 0.02)
+    port = obs.port
+    switcher = connect_switcher(obs)
+    engine = stop_later(CueEngine(switcher, stats_dump_path=None))
+    engine.append_lines(["one", "two"])
+    settings_store = stop_later(SettingsStore(switcher, cache_path=str(tmp_path / "cache.json"), save_delay=0.01))
+    settings_store.load()
+    assert settings_store.loaded.wait(2)
+
+    obs.stop_thread()
+    assert wait_until(lambda: not switcher.is_connected())
+    assert switcher.is_busy()
+    engine.next_line()
+    switcher.scene2 = "Text 2 (renamed)"
+    settings_store.save()
+
+    restarted = FakeOBSServer("127.0.0.1", port, transition_duration=0.05)
+    restarted.scenes["Text 2 (renamed)"] = restarted.scenes.pop("Text 2")
+    restarted.start_in_thread()
+    try:
+        assert wait_until(switcher.is_connected)
+        # The cue was buffered and the pending settings change is written after the reconnect
+        assert wait_until(lambda: restarted.program_scene == "Text 2 (renamed)")
+        assert restarted.inputs["Text Source 2"]["text"] == "one"
+        assert wait_until(lambda: restarted.persistent_data.get(("OBS_WEBSOCKET_DATA_REALM_GLOBAL",
+                                                                   obs_text.SETTINGS_SLOT), {}).get("scene2")
+                          == "Text 2 (renamed)")
+    finally:
+        switcher.disconnect()
+        restarted.stop_thread()
@@ -0,0 +1,47 @@
+import pytest
+from scene_discovery import SceneDiscovery
+from tests.helpers import emit_event, wait_until
+
+
+@pytest.fixture
+def discovery(obs, connect_switcher):
+    scene_discovery = SceneDiscovery(connect_switcher(obs))
+    yield scene_discovery
+    scene_discovery.shutdown()
+
+
+def test_entries_are_fetched_in_the_background_and_cached(obs, discovery):
+    assert discovery.get_scene_names() is None
+    assert wait_until(lambda: discovery.get_scene_names() == ["Text 1", "Text 2"])
+    assert discovery.get_text_sources("Text 2") is None
+    assert wait_until(lambda: discovery.get_text_sources("Text 2") == ["Text Source 2"])
+    for _ in range(3):
+        discovery.get_scene_names()
+        discovery.get_text_sources("Text 2")
+    assert obs.request_counts["GetSceneList"] == 1
+    assert obs.request_counts["GetSceneItemList"] == 1
+
+
+def test_events_invalidate_the_matching_entries(obs, discovery):
+    assert wait_until(lambda: discovery.get_scene_names() is not None)
+    assert wait_until(lambda: discovery.get_text_sources("Text 1") is not None)
+    changed = []
+    discovery.listeners.append(lambda: changed.append(True))
+
+    obs.scenes["Text 3"] = []
+    emit_event(obs, "SceneCreated", {"sceneName": "Text 3", "isGroup": False})
+    assert wait_until(lambda: "Text 3" in discovery.get_scene_names())
+
+    obs.scenes["Text 1"].append("Text Source 3")
+    emit_event(obs, "SceneItemCreated", {"sceneName": "Text 1", "sourceName": "Text Source 3", "sceneItemId": 2,
+                                         "sceneItemIndex": 1})
+    assert wait_until(lambda: discovery.get_text_sources("Text 1") == ["Text Source 1", "Text Source 3"])
+
+    emit_event(obs, "InputNameChanged", {"oldInputName": "Text Source 3", "inputName": "Names"})
+    assert wait_until(lambda: discovery.get_text_sources("Text 1") == ["Text Source 1", "Names"])
+
+    del obs.scenes["Text 1"]
+    emit_event(obs, "SceneRemoved", {"sceneName": "Text 1", "isGroup": False})
+    assert wait_until(lambda: discovery.get_scene_names() == ["Text 2", "Text 3"])
+    assert "Text 1" not in discovery.text_sources
+    assert changed
@@ -0,0 +1,86 @@
+import os
+import pytest
+from script_journal import ScriptJournal, INSERT, REMOVE, EDIT
+
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / "script.txt"
+    path.write_text("one\ntwo\nthree\n", encoding="utf8")
+    return str(path)
+
+
+def crash(journal):
+    # The process dies without saving or discarding
+    journal.file.close()
+
+
+def test_edits_are_replayed_after_a_crash(script):
+    journal = ScriptJournal(script)
+    journal.record(INSERT, 0, "zero")
+    journal.record(EDIT, 2, "TWO")
+    journal.record(REMOVE, 3)
+    crash(journal)
+
+    lines = ["one", "two", "three"]
+    assert ScriptJournal(script).recover(lines) == 3
+    assert lines == ["zero", "one", "TWO"]
+
+
+def test_recovered_journal_is_appended_to(script):
+    journal = ScriptJournal(script)
+    journal.record(EDIT, 0, "ONE")
+    crash(journal)
+
+    journal = ScriptJournal(script)
+    lines = ["one", "two", "three"]
+    journal.recover(lines)
+    journal.record(EDIT, 1, "TWO")
+    crash(journal)
+
+    lines = ["one", "two", "three"]
+    assert ScriptJournal(script).recover(lines) == 2
+    assert lines == ["ONE", "TWO", "three"]
+
+
+def test_torn_last_entry_is_dropped(script):
+    journal = ScriptJournal(script)
+    journal.record(EDIT, 0, "ONE")
+    journal.file.write('["edit", 1, "TW')
+    crash(journal)
+
+    lines = ["one", "two", "three"]
+    assert ScriptJournal(script).recover(lines) == 1
+    assert lines == ["ONE", "two", "three"]
+    with open(script + ".journal", encoding="utf8") as file:
+        assert len(file.readlines()) == 2
+
+
+def test_journal_of_another_version_of_the_script_is_ignored(script):
+    journal = ScriptJournal(script)
+    journal.record(EDIT, 0, "ONE")
+    crash(journal)
+    with open(script, "a", encoding="utf8") as file:
+        file.write("four\n")
+
+    lines = ["one", "two", "three", "four"]
+    assert ScriptJournal(script).recover(lines) == 0
+    assert lines == ["one", "two", "three", "four"]
+
+
+def test_discard_removes_the_journal(script):
+    journal = ScriptJournal(script)
+    journal.record(EDIT, 0, "ONE")
+    journal.discard()
+    assert not os.path.exists(script + ".journal")
+    assert ScriptJournal(script).recover(["one"]) == 0
+
+
+def test_every_entry_is_synced(script, monkeypatch):
+    synced = []
+    monkeypatch.setattr(os, "fsync", synced.append)
+    journal = ScriptJournal(script)
+    journal.record(EDIT, 0, "ONE")
+    journal.record(REMOVE, 1)
+    assert len(synced) == 2
+    journal.discard()
@@ -0,0 +1,102 @@
+import random
+import pytest
+from script_search import ScriptIndex, LineOrder, SortedKeys, EXACT, PREFIX, FUZZY, normalize
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    # Splits and empties blocks often
+    monkeypatch.setattr(LineOrder, "BLOCK_SIZE", 4)
+    monkeypatch.setattr(SortedKeys, "BLOCK_SIZE", 3)
+
+
+def brute_force(lines, query):
+    key = normalize(query)
+    exact = [(index, EXACT) for index, line in enumerate(lines) if normalize(line) == key]
+    prefix = [(index, PREFIX) for index, line in enumerate(lines)
+              if normalize(line) != key and normalize(line).startswith(key)]
+    return sorted(exact + prefix)
+
+
+def check(index, lines):
+    assert len(index.order) == len(lines)
+    for line_index, line in enumerate(lines):
+        line_id = index.order.id_at(line_index)
+        assert index.order.index_of(line_id) == line_index
+        assert index.keys[line_id] == normalize(line)
+    assert list(index.sorted_keys.iter_from("")) == sorted({normalize(line) for line in lines})
+
+
+def test_edits_match_brute_force(small_blocks):
+    rng = random.Random(1)
+    words = ["Hello", "hello!", "help", "he", "world", "Word", ""]
+    lines = [rng.choice(words) for _ in range(30)]
+    index = ScriptIndex(lines)
+    for _ in range(1500):
+        operation = rng.random()
+        if operation < 0.35 or not lines:
+            line_index, text = rng.randint(0, len(lines)), rng.choice(words)
+            lines.insert(line_index, text)
+            index.insert(line_index, text)
+        elif operation < 0.65:
+            line_index = rng.randrange(len(lines))
+            del lines[line_index]
+            index.remove(line_index)
+        elif operation < 0.85:
+            line_index, text = rng.randrange(len(lines)), rng.choice(words)
+            lines[line_index] = text
+            index.update(line_index, text)
+        else:
+            added = [rng.choice(words) for _ in range(rng.randint(1, 6))]
+            lines.extend(added)
+            index.append(added)
+        check(index, lines)
+        query = rng.choice(["he", "hel", "hello", "wor", "word", "x"])
+        assert sorted(index.search(query, limit=len(lines) + 1)) == brute_force(lines, query)
+
+
+def test_exact_matches_come_first_then_the_nearest_after_the_active_line():
+    index = ScriptIndex(["stop", "Stop!", "stopping", "stop", "go"])
+    assert index.search("stop", limit=10, after_index=1) == [(3, EXACT), (1, EXACT), (0, EXACT), (2, PREFIX)]
+
+
+def test_repeated_lines_dont_crowd_out_other_prefix_matches():
+    index = ScriptIndex(["applause"] * 100 + ["apple"])
+    candidates = [index.order.index_of(line_id) for line_id in index._prefix_ids("app", limit=1)]
+    assert 100 in candidates
+
+
+def test_fuzzy_match_only_without_exact_or_prefix_matches():
+    index = ScriptIndex(["the quick brown fox", "jumps over the lazy dog"])
+    assert index.search("the quick brwn fox") == [(0, FUZZY)]
+    assert index.search("jumps") == [(1, PREFIX)]
+    assert index.search("zzzz") == []
+
+
+def test_background_rebuild_applies_edits_made_meanwhile():
+    lines = [f"line {number}" for number in range(2000)]
+    index = ScriptIndex(["stale"])
+    with index.lock:
+        # The build can't be swapped in before the edits are made
+        index.rebuild_in_background(lines)
+        edits = [("insert", 0, "line new"), ("remove", 5), ("update", 1, "line edited"), ("append", ["line end"])]
+        for edit, *args in edits:
+            getattr(index, edit)(*args)
+        assert index.building is not None
+    lines.insert(0, "line new")
+    del lines[5]
+    lines[1] = "line edited"
+    lines.append("line end")
+    assert index.search("line", limit=len(lines) + 1) is not None
+    check(index, lines)
+    for query in ("line new", "line edited", "line 1", "stale"):
+        assert sorted(index.search(query, limit=len(lines))) == brute_force(lines, query)
+
+
+def test_rebuild_discards_a_background_build():
+    index = ScriptIndex()
+    with index.lock:
+        index.rebuild_in_background(["old"])
+        index.rebuild(["new"])
+    assert index.search("old") == []
+    assert index.search("new") == [(0, EXACT)]
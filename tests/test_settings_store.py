@@ -0,0 +1,59 @@
+import json
+import obs_text
+from obs_client import OBSClient
+from settings_store import SettingsStore
+from tests.conftest import SETTINGS
+from tests.helpers import wait_until
+
+SLOT = ("OBS_WEBSOCKET_DATA_REALM_GLOBAL", obs_text.SETTINGS_SLOT)
+
+
+def test_cached_settings_apply_without_obs(stop_later, tmp_path):
+    cache_path = tmp_path / "cache.json"
+    cache_path.write_text(json.dumps(SETTINGS), encoding="utf8")
+    switcher = obs_text.OBSTextSwitcher(client=OBSClient("127.0.0.1", 1))
+    settings_store = stop_later(SettingsStore(switcher, cache_path=str(cache_path)))
+    settings_store.load()
+    assert switcher.get_settings() == SETTINGS
+    assert not settings_store.loaded.is_set()
+
+
+def test_obs_settings_win_over_the_cache(obs, connect_switcher, stop_later, tmp_path):
+    cache_path = tmp_path / "cache.json"
+    cache_path.write_text(json.dumps(dict(SETTINGS, scene1="Cached")), encoding="utf8")
+    obs.persistent_data[SLOT] = SETTINGS
+    switcher = connect_switcher(obs)
+    switcher.apply_settings({})
+    settings_store = stop_later(SettingsStore(switcher, cache_path=str(cache_path)))
+    loaded = []
+    settings_store.listeners.append(lambda: loaded.append(switcher.get_settings()))
+    settings_store.load()
+    assert settings_store.loaded.wait(2)
+    assert loaded == [SETTINGS]
+    assert json.loads(cache_path.read_text(encoding="utf8")) == SETTINGS
+
+
+def test_changes_are_written_once_they_settled(obs, connect_switcher, stop_later, tmp_path):
+    cache_path = tmp_path / "cache.json"
+    switcher = connect_switcher(obs)
+    settings_store = stop_later(SettingsStore(switcher, cache_path=str(cache_path), save_delay=0.1))
+    settings_store.load()
+    assert settings_store.loaded.wait(2)
+    for scene in ("A", "B", "C"):
+        switcher.scene1 = scene
+        settings_store.save()
+    assert SLOT not in obs.persistent_data
+    assert wait_until(lambda: obs.persistent_data.get(SLOT, {}).get("scene1") == "C")
+    assert obs.request_counts["SetPersistentData"] == 1
+    assert json.loads(cache_path.read_text(encoding="utf8"))["scene1"] == "C"
+
+
+def test_pending_change_is_flushed_on_stop(obs, connect_switcher, tmp_path):
+    switcher = connect_switcher(obs)
+    settings_store = SettingsStore(switcher, cache_path=str(tmp_path / "cache.json"), save_delay=60)
+    settings_store.load()
+    assert settings_store.loaded.wait(2)
+    switcher.scene2 = "Changed"
+    settings_store.save()
+    settings_store.stop()
+    assert obs.persistent_data[SLOT]["scene2"] == "Changed"
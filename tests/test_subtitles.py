@@ -0,0 +1,122 @@
+import io
+import pytest
+import config
+from subtitles import Subtitle, SubtitlePlayer, parse_subtitles
+from latency import LatencyEstimate
+from cue_engine import CueEngine
+from tests.helpers import FakeSwitcher, wait_until
+
+SRT = """1
+00:00:01,000 --> 00:00:02,500
+<i>Hello</i>
+world
+
+2
+00:00:03,000 --> 00:00:04,000
+Second
+"""
+
+VTT = """WEBVTT
+
+NOTE a comment
+with two lines
+
+intro
+00:01.000 --> 00:02.000 align:start
+<v Anna>Hi <c.loud>there</c>
+
+01:00:00.000 --> 01:00:01.500
+Late
+"""
+
+
+class Engine:
+    def __init__(self):
+        self.lines = []
+        self.cue_latency = LatencyEstimate()
+
+    def append_lines(self, lines):
+        self.lines.extend(lines)
+
+
+def test_parse_srt():
+    assert list(parse_subtitles(io.StringIO(SRT))) == [Subtitle(1.0, 2.5, "Hello world"), Subtitle(3.0, 4.0, "Second")]
+
+
+def test_parse_vtt():
+    assert list(parse_subtitles(io.StringIO(VTT))) == [Subtitle(1.0, 2.0, "Hi there"), Subtitle(3600.0, 3601.5, "Late")]
+
+
+def test_parse_is_lazy():
+    subtitles = parse_subtitles(iter(SRT.splitlines(keepends=True) + [None]))
+    # Reading past the second subtitle would fail on None
+    assert next(subtitles).text == "Hello world"
+
+
+@pytest.fixture
+def make_player(stop_later):
+    def make(text):
+        engine = Engine()
+        return engine, stop_later(SubtitlePlayer(engine, io.StringIO(text)))
+
+    return make
+
+
+def test_out_of_order_subtitles_play_in_time_order(make_player):
+    engine, player = make_player("""1
+00:00:05,000 --> 00:00:06,000
+Later
+
+2
+00:00:01,000 --> 00:00:02,000
+Earlier
+""")
+    with player.condition:
+        assert player._target_at(1.5) == (1, 2.0)
+        assert player._target_at(3.0) == (None, 5.0)
+        assert player._target_at(5.5) == (0, 6.0)
+    assert engine.lines == ["Later", "Earlier"]
+
+
+def test_short_gaps_keep_the_text_up(make_player):
+    engine, player = make_player("""1
+00:00:01,000 --> 00:00:02,000
+One
+
+2
+00:00:02,100 --> 00:00:03,000
+Two
+""")
+    with player.condition:
+        assert player._target_at(2.05) == (0, 2.1)
+
+
+def test_seek_forgets_the_armed_subtitle(make_player):
+    engine, player = make_player(SRT)
+    player.armed = 1
+    player.seek(0.5)
+    assert player.armed is None
+    assert player.clock.position() == 0.5
+
+
+def test_playback_shows_a_subtitle_found_out_of_order(stop_later, tmp_path):
+    path = tmp_path / "script.srt"
+    path.write_text("""1
+00:01:40,000 --> 00:01:41,000
+late
+
+2
+00:00:00,100 --> 00:00:00,300
+early
+
+3
+00:00:00,400 --> 00:00:00,500
+second
+""", encoding="utf8")
+    switcher = FakeSwitcher()
+    engine = stop_later(CueEngine(switcher, config.CUE_QUEUE_POLICY, stats_dump_path=None))
+    engine.load_subtitles_from_path(str(path))
+    assert engine.lines == ["late"]
+    engine.play()
+    assert wait_until(lambda: switcher.texts == ["early", "second", ""])
+    assert engine.lines == ["late", "early", "second"]
@@ -0,0 +1,105 @@
+import os
+import re
+import config
+import obs_text
+from cue_engine import CueEngine
+from obs_mirror import OBSMirror
+from settings_store import SettingsStore
+from latency import stats, StatsDumper
+
+CHANNEL_NAME_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+# Would clash with the OSC addresses of the first channel
+RESERVED_CHANNEL_NAMES = {"next", "previous", "hide", "goto", "start", "pause", "seek", "stats"}
+
+
+class TextChannel:
+    """
+    One independent text: its own scene/source pair, script, cursor, transition state and cue worker.
+    """
+
+    def __init__(self, name, obs_text_switcher, settings_store, cue_policy):
+        self.name = name
+        self.obs_text_switcher = obs_text_switcher
+        self.settings_store = settings_store
+        self.engine = CueEngine(obs_text_switcher, cue_policy, stats_dump_path=None)
+
+
+class TextChannels:
+    """
+    The configured channels by name, all sharing the OBS connection of the first one (and its mirrors' ones).
+    The first channel keeps the settings slot and cache file of the single channel version.
+    Every channel has its own cue worker, so a cue on one channel never waits for another one.
+    """
+
+    def __init__(self, names=config.TEXT_CHANNELS, cue_policy=config.CUE_QUEUE_POLICY):
+        if not names:
+            raise ValueError("At least one text channel is needed")
+        for name in names:
+            if not CHANNEL_NAME_PATTERN.fullmatch(name) or name in RESERVED_CHANNEL_NAMES:
+                raise ValueError(f"Invalid text channel name: '{name}'")
+        if len(set(names)) != len(names):
+            raise ValueError("Text channel names must be unique")
+
+        self.channels = {}
+        client = None
+        mirror_clients = [None] * len(config.OBS_MIRRORS)
+        cache_root, cache_extension = os.path.splitext(config.SETTINGS_CACHE_PATH)
+        for name in names:
+            if client is None:
+                obs_text_switcher = obs_text.OBSTextSwitcher()
+                settings_store = SettingsStore(obs_text_switcher)
+                client = obs_text_switcher.client
+            else:
+                obs_text_switcher = obs_text.OBSTextSwitcher(client=client,
+                                                             settings_slot=f"{obs_text.SETTINGS_SLOT}_{name}")
+                settings_store = SettingsStore(obs_text_switcher, cache_path=f"{cache_root}_{name}{cache_extension}")
+            for index, (host, port, password) in enumerate(config.OBS_MIRRORS):
+                if mirror_clients[index] is None:
+                    mirror_switcher = obs_text.OBSTextSwitcher(host, port, password)
+                    mirror_clients[index] = mirror_switcher.client
+                else:
+                    mirror_switcher = obs_text.OBSTextSwitcher(client=mirror_clients[index])
+                obs_text_switcher.add_mirror(OBSMirror(f"{host}:{port}", mirror_switcher))
+            self.channels[name] = TextChannel(name, obs_text_switcher, settings_store, cue_policy)
+        self.default = next(iter(self.channels.values()))
+
+        self.stats_dumper = None
+        if config.LATENCY_STATS_DUMP_PATH:
+            self.stats_dumper = StatsDumper(config.LATENCY_STATS_DUMP_PATH, config.LATENCY_STATS_DUMP_INTERVAL,
+                                            self.get_stats)
+
+    def __iter__(self):
+        return iter(self.channels.values())
+
+    def __len__(self):
+        return len(self.channels)
+
+    def __getitem__(self, name):
+        return self.channels[name]
+
+    def get_engines(self):
+        return {name: channel.engine for name, channel in self.channels.items()}
+
+    def get_stats(self):
+        return dict(latency=stats.summary(),
+                    queues={name: channel.engine.cue_scheduler.get_stats() for name, channel in self.channels.items()},
+                    instances={name: channel.obs_text_switcher.get_instance_stats()
+                               for name, channel in self.channels.items()})
+
+    def load_settings(self):
+        for channel in self:
+            channel.settings_store.load()
+
+    def stop(self):
+        if self.stats_dumper is not None:
+            self.stats_dumper.stop()
+        for channel in self:
+            channel.engine.stop()
+            channel.engine.close_file()
+        for channel in self:
+            channel.settings_store.stop()
+
+    def disconnect(self):
+        # The first channel owns the connection, so it goes last
+        for channel in reversed(list(self)):
+            channel.obs_text_switcher.disconnect()